@@ -1,7 +1,10 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 import datetime
+import time
+from config import TIMESERIES_DIR
+from timeseries_store import TimeSeriesStore
 
 app = Flask(__name__)
 
@@ -37,5 +40,31 @@ def get_images(class_id):
     
     return jsonify(results.get('files', []))
 
+def get_history_store():
+    # Mở chỉ đọc: tiến trình phát hiện là nơi duy nhất ghi dữ liệu
+    return TimeSeriesStore(TIMESERIES_DIR, readonly=True)
+
+@app.route('/api/history')
+def list_history():
+    return jsonify(get_history_store().series())
+
+@app.route('/api/history/<series>')
+def get_history(series):
+    # Khoảng thời gian theo epoch giây, mặc định 24h gần nhất
+    end = request.args.get('end', default=time.time(), type=float)
+    start = request.args.get('start', default=end - 86400, type=float)
+    resolution = request.args.get('resolution', default=None, type=int)
+    
+    try:
+        resolution, points = get_history_store().query(series, start, end, resolution)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "series": series,
+        "resolution": resolution,
+        "points": points  # [timestamp, mean, min, max]
+    })
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Benchmark script for comparing detector backends on this device
+Run: python benchmark_detector.py --backends darknet onnx --image sample.jpg
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+from config import CONFIDENCE_THRESHOLD
+from detector_backends import BACKENDS, create_backend_from_config
+
+
+def load_frames(image_path, count, width=1280, height=720):
+    """Load a test image, or grab frames from the webcam when no image is given"""
+    if image_path:
+        frame = cv2.imread(image_path)
+        if frame is None:
+            raise FileNotFoundError(f"Cannot read image: {image_path}")
+        return [frame] * count
+
+    camera = cv2.VideoCapture(0)
+    camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    frames = []
+    while len(frames) < count:
+        ret, frame = camera.read()
+        if not ret or frame is None:
+            break
+        frames.append(frame)
+    camera.release()
+    if not frames:
+        # Không có camera: dùng frame nhiễu để đo tốc độ thuần
+        frames = [np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)] * count
+    return frames
+
+
+def benchmark_backend(name, frames, warmup=5):
+    """Run one backend over the frames and return latency statistics in ms"""
+    backend = create_backend_from_config(name)
+    for frame in frames[:warmup]:
+        backend.detect(frame, CONFIDENCE_THRESHOLD)
+
+    latencies = []
+    detections = 0
+    for frame in frames:
+        start = time.perf_counter()
+        boxes, _, _ = backend.detect(frame, CONFIDENCE_THRESHOLD)
+        latencies.append((time.perf_counter() - start) * 1000)
+        detections += len(boxes)
+
+    latencies = np.array(latencies)
+    return {
+        "backend": name,
+        "runtime": getattr(backend, "runtime", "opencv"),
+        "mean_ms": latencies.mean(),
+        "p95_ms": np.percentile(latencies, 95),
+        "fps": 1000 / latencies.mean(),
+        "detections_per_frame": detections / len(frames),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare detector backends")
+    parser.add_argument("--backends", nargs="+", default=sorted(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument("--image", help="Test image, defaults to webcam frames")
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    frames = load_frames(args.image, args.frames)
+    print(f"{'backend':<10}{'runtime':<13}{'mean ms':>9}{'p95 ms':>9}{'fps':>8}{'det/frame':>11}")
+    for name in args.backends:
+        try:
+            r = benchmark_backend(name, frames)
+        except Exception as e:
+            print(f"{name:<10}failed: {e}")
+            continue
+        print(f"{r['backend']:<10}{r['runtime']:<13}{r['mean_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+              f"{r['fps']:>8.1f}{r['detections_per_frame']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
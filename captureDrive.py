@@ -27,7 +27,7 @@ class DriveUploader:
             print(f"Error initializing Google Drive API: {e}")
             self.service = None
     
-    def upload_image(self, image_path, class_name="human", class_id="21040202"):
+    def upload_image(self, image_path, class_name="human", class_id="21040202", event_id=None):
         """
         Upload image to Google Drive with proper naming convention
         
@@ -35,6 +35,7 @@ class DriveUploader:
             image_path (str): Path to the image file
             class_name (str): Class of detected object (e.g., "human")
             class_id (str): Class ID (e.g., student class ID "Lop21040202")
+            event_id (str): Intrusion event ID appended to the filename
             
         Returns:
             dict: File metadata if successful, None if failed
@@ -49,6 +50,8 @@ class DriveUploader:
             date_str = now.strftime("%Y%m%d")
             time_str = now.strftime("%H%M%S")
             filename = f"{class_name}_{class_id}_{date_str}_{time_str}.jpg"
+            if event_id:
+                filename = f"{class_name}_{class_id}_{date_str}_{time_str}_{event_id}.jpg"
             
             # Create file metadata
             file_metadata = {
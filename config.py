@@ -19,4 +19,72 @@ TELEGRAM_CHAT_ID = "____your_telegram_chat_id____"
 
 # Detection settings
 CONFIDENCE_THRESHOLD = 0.5
-ALERT_COOLDOWN_SECONDS = 15  # Minimum time between alerts
\ No newline at end of file
+ALERT_COOLDOWN_SECONDS = 15  # Minimum time between alerts
+
+# Detector backend settings
+DETECTOR_BACKEND = "darknet"  # "darknet" (yolov4-tiny) or "onnx"
+DETECTOR_INPUT_SIZE = 416  # Network input width/height in pixels
+CLASSNAMES_FILE = "model/classnames.txt"
+DARKNET_WEIGHTS_FILE = "model/yolov4-tiny.weights"
+DARKNET_CONFIG_FILE = "model/yolov4-tiny.cfg"
+ONNX_MODEL_FILE = "model/yolov8n-int8.onnx"  # FP32 or INT8-quantized export
+ONNX_RUNTIME = "auto"  # "auto" (onnxruntime if installed), "onnxruntime" or "opencv"
+ONNX_OUTPUT_FORMAT = "auto"  # "auto", "yolov5" or "yolov8"
+ONNX_NUM_THREADS = None  # onnxruntime intra-op threads, None keeps its default (the governor sets it when enabled)
+
+# Intrusion event settings (chống nhấp nháy khi phát hiện chập chờn)
+INTRUSION_ENTER_DWELL_SECONDS = 1.0  # Zone must stay occupied this long before an intrusion starts
+INTRUSION_EXIT_GRACE_SECONDS = 3.0  # Zone must stay empty this long before an intrusion ends
+INTRUSION_MIN_HOLD_SECONDS = 5.0  # Minimum duration of an intrusion event
+
+# Detection loop settings (có thể thay đổi từ xa qua topic down)
+DETECTION_INTERVAL_SECONDS = 0.0  # Minimum seconds between model runs, 0 runs on every frame
+
+# Occupancy statistics (gửi bản tóm tắt theo cửa sổ thay cho số người mỗi giây)
+OCCUPANCY_WINDOW_SECONDS = 60  # Summary window length, 0 keeps the legacy 1 s raw people count
+OCCUPANCY_GRID_SIZE = (16, 9)  # Heatmap columns, rows
+OCCUPANCY_HEATMAP_FILE = "occupancy_heatmap.npy"  # Cumulative heatmap saved after each window
+
+# Local history (chuỗi thời gian số người / LED, phục vụ qua apiBackend.py)
+TIMESERIES_DIR = "timeseries"  # Folder for the ring buffer files, None disables local history
+
+# Live view (MJPEG stream from the detector process)
+STREAM_ENABLED = False
+STREAM_HOST = "0.0.0.0"
+STREAM_PORT = 8080  # http://<pi>:8080/stream.mjpg
+STREAM_MAX_FPS = 10  # Encoded frames per second, shared by all viewers
+STREAM_JPEG_QUALITY = 70
+
+# Alert snapshot settings
+SNAPSHOT_SCALE = 0.2  # Snapshot size relative to the displayed frame (single-resolution mode)
+EVIDENCE_SCALE = 1.0  # Snapshot size relative to the full-resolution capture (dual-resolution mode)
+
+# Alert snapshot de-duplication (dHash 64 bit)
+SNAPSHOT_DEDUP_THRESHOLD = 6  # Max Hamming distance treated as the same scene, -1 disables
+SNAPSHOT_DEDUP_HISTORY = 8  # Recent hashes remembered per zone
+SNAPSHOT_DUPLICATE_ACTION = "skip"  # "skip" drops the upload, "text" sends a Telegram text instead of a photo
+
+# Thermal / CPU-load governor (Raspberry Pi bắt đầu giảm xung ở 80°C)
+GOVERNOR_ENABLED = True
+THERMAL_ZONE_PATH = "/sys/class/thermal/thermal_zone0/temp"
+LOADAVG_PATH = "/proc/loadavg"
+GOVERNOR_TEMP_HIGH_C = 75.0  # Switch to a lighter level at or above this temperature
+GOVERNOR_TEMP_LOW_C = 65.0  # Return to a heavier level only at or below this temperature
+GOVERNOR_LATENCY_TARGET_SECONDS = 0.5  # Average model run time target
+GOVERNOR_POLL_SECONDS = 5.0
+GOVERNOR_STEP_UP_SECONDS = 20.0  # Minimum time at a level before switching to an even lighter one
+GOVERNOR_LEVELS = (  # Heaviest first; level 0 runs at DETECTION_INTERVAL_SECONDS and DETECTOR_INPUT_SIZE
+    {"num_threads": 4},
+    {"detect_interval": 0.2, "input_size": 416, "num_threads": 3},
+    {"detect_interval": 0.5, "input_size": 320, "num_threads": 2},
+    {"detect_interval": 1.0, "input_size": 256, "num_threads": 2},
+)
+
+# Dual-resolution pipeline: per-frame work on a small frame, full resolution only for alert evidence
+DUAL_RESOLUTION_ENABLED = True
+INFERENCE_FRAME_SIZE = (640, 360)  # Width, height of the processed/displayed frame
+FULL_RES_BUFFER_FRAMES = 2  # Full-resolution captures kept for evidence
+
+# Saved monitoring zones (tự động nạp lại khi khởi động)
+ZONES_DIR = "zones"
+CAMERA_ID = "camera0"  # Zones are stored per camera and dropped when its resolution changes
@@ -0,0 +1,260 @@
+"""
+Detector backends for person detection
+
+Each backend wraps one inference runtime and handles its own output decoding,
+so YoloDetect only ever sees boxes in frame pixel coordinates.
+"""
+import cv2
+import numpy as np
+from config import (DETECTOR_BACKEND, DETECTOR_INPUT_SIZE, DARKNET_WEIGHTS_FILE, DARKNET_CONFIG_FILE,
+                    ONNX_MODEL_FILE, ONNX_RUNTIME, ONNX_OUTPUT_FORMAT, ONNX_NUM_THREADS)
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+
+class DetectorBackend:
+    """
+    Base class for detector backends
+
+    Subclasses implement `_forward` (run the network on a blob) and `_decode`
+    (turn raw network outputs into boxes for the given frame size).
+    """
+    name = "base"
+    # True nếu có thể đổi input_size khi đang chạy mà không nạp lại model
+    supports_dynamic_input = True
+
+    def __init__(self, input_size=(416, 416), scale=1 / 255, swap_rb=True):
+        """
+        Args:
+            input_size (tuple): Network input size as (width, height)
+            scale (float): Pixel scale factor applied when building the blob
+            swap_rb (bool): Convert BGR frames to RGB before inference
+        """
+        self.input_size = tuple(input_size)
+        self.scale = scale
+        self.swap_rb = swap_rb
+        self._resized = None
+        self._blob = None
+
+    def make_blob(self, frame):
+        """
+        Build a NCHW float32 blob from a BGR frame
+
+        Same result as cv2.dnn.blobFromImage(frame, scale, input_size, swapRB=swap_rb),
+        but the resize and blob buffers are kept between calls.
+        """
+        width, height = self.input_size
+        if self._blob is None or self._blob.shape[2:] != (height, width):
+            self._resized = np.empty((height, width, 3), dtype=np.uint8)
+            self._blob = np.empty((1, 3, height, width), dtype=np.float32)
+
+        cv2.resize(frame, (width, height), dst=self._resized)
+        pixels = self._resized[:, :, ::-1] if self.swap_rb else self._resized
+        np.multiply(pixels.transpose(2, 0, 1), self.scale, out=self._blob[0], dtype=np.float32)
+        return self._blob
+
+    def detect(self, frame, conf_threshold, class_ids=None):
+        """
+        Run detection on a frame
+
+        Args:
+            frame (numpy.ndarray): BGR frame
+            conf_threshold (float): Minimum confidence to keep a detection
+            class_ids (set): Class ids to keep, None keeps every class
+
+        Returns:
+            tuple: (boxes, confidences, class_ids) where boxes are [x, y, w, h]
+                   in frame pixel coordinates
+        """
+        outs = self._forward(self.make_blob(frame))
+        frame_height, frame_width = frame.shape[:2]
+        return self._decode(outs, frame_width, frame_height, conf_threshold, class_ids)
+
+    def set_num_threads(self, num_threads):
+        """Set the number of threads used for inference (OpenCV thread pool by default)"""
+        cv2.setNumThreads(num_threads)
+
+    def _forward(self, blob):
+        raise NotImplementedError
+
+    def _decode(self, outs, frame_width, frame_height, conf_threshold, class_ids):
+        raise NotImplementedError
+
+    @staticmethod
+    def _filter(scores, conf_threshold, class_ids):
+        """Pick the best class per row and return (mask, best_ids, best_scores)"""
+        best_ids = np.argmax(scores, axis=1)
+        best_scores = scores[np.arange(len(scores)), best_ids]
+        mask = best_scores >= conf_threshold
+        if class_ids is not None:
+            mask &= np.isin(best_ids, list(class_ids))
+        return mask, best_ids, best_scores
+
+    @staticmethod
+    def _to_lists(x, y, w, h, scores, ids):
+        boxes = [[float(bx), float(by), int(bw), int(bh)] for bx, by, bw, bh in zip(x, y, w, h)]
+        return boxes, [float(s) for s in scores], [int(i) for i in ids]
+
+
+class DarknetBackend(DetectorBackend):
+    """YOLO darknet model (.weights/.cfg) loaded through cv2.dnn.readNet"""
+    name = "darknet"
+
+    def __init__(self, weights_file, config_file, **kwargs):
+        super().__init__(**kwargs)
+        self.model = cv2.dnn.readNet(weights_file, config_file)
+        layer_names = self.model.getLayerNames()
+        self.output_layers = [layer_names[i - 1] for i in np.array(self.model.getUnconnectedOutLayers()).flatten()]
+
+    def _forward(self, blob):
+        self.model.setInput(blob)
+        return self.model.forward(self.output_layers)
+
+    def _decode(self, outs, frame_width, frame_height, conf_threshold, class_ids):
+        # Each row: cx, cy, w, h (normalized), objectness, class scores...
+        rows = np.vstack([out.reshape(-1, out.shape[-1]) for out in outs])
+        mask, best_ids, best_scores = self._filter(rows[:, 5:], conf_threshold, class_ids)
+        rows = rows[mask]
+
+        center_x = (rows[:, 0] * frame_width).astype(int)
+        center_y = (rows[:, 1] * frame_height).astype(int)
+        w = (rows[:, 2] * frame_width).astype(int)
+        h = (rows[:, 3] * frame_height).astype(int)
+        return self._to_lists(center_x - w / 2, center_y - h / 2, w, h, best_scores[mask], best_ids[mask])
+
+
+class OnnxBackend(DetectorBackend):
+    """
+    YOLO model exported to ONNX (FP32 or INT8-quantized)
+
+    Runs through onnxruntime when it is installed, otherwise through
+    cv2.dnn.readNetFromONNX. Supports YOLOv5-style outputs (1, N, 5 + classes)
+    and YOLOv8-style outputs (1, 4 + classes, N) with boxes in input pixels.
+    """
+    name = "onnx"
+
+    def __init__(self, model_file, runtime="auto", output_format="auto", num_threads=None, **kwargs):
+        """
+        Args:
+            model_file (str): Path to the .onnx model
+            runtime (str): "auto", "onnxruntime" or "opencv"
+            output_format (str): "auto", "yolov5" or "yolov8"
+            num_threads (int): Intra-op threads for onnxruntime, None keeps its default
+        """
+        super().__init__(**kwargs)
+        self.model_file = model_file
+        self.output_format = output_format
+        self.num_threads = num_threads
+
+        if runtime == "onnxruntime" and ort is None:
+            raise ImportError("onnxruntime is not installed")
+
+        self.session = None
+        self.model = None
+        if ort is not None and runtime in ("auto", "onnxruntime"):
+            self.session = self._create_session()
+            model_input = self.session.get_inputs()[0]
+            self.input_name = model_input.name
+            # Trục H/W động được khai báo bằng tên (str) hoặc None thay vì số
+            self.supports_dynamic_input = not all(isinstance(d, int) for d in model_input.shape[2:])
+            if not self.supports_dynamic_input:
+                # Model xuất với shape cố định: blob phải đúng kích thước đó
+                input_size = (model_input.shape[3], model_input.shape[2])
+                if input_size != self.input_size:
+                    print(f"ONNX model has a fixed input of {input_size[0]}x{input_size[1]}, "
+                          f"ignoring input size {self.input_size[0]}x{self.input_size[1]}")
+                    self.input_size = input_size
+            self.runtime = "onnxruntime"
+        else:
+            self.model = cv2.dnn.readNetFromONNX(model_file)
+            # cv2.dnn không cho biết shape input, coi như cố định
+            self.supports_dynamic_input = False
+            self.runtime = "opencv"
+
+    def _create_session(self):
+        options = ort.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        return ort.InferenceSession(self.model_file, sess_options=options, providers=["CPUExecutionProvider"])
+
+    def set_num_threads(self, num_threads):
+        """
+        Set the inference thread count
+
+        onnxruntime fixes the thread pool when the session is created, so the
+        session is rebuilt (only when the count actually changes).
+        """
+        super().set_num_threads(num_threads)
+        if self.session is None or num_threads == self.num_threads:
+            return
+        self.num_threads = num_threads
+        self.session = self._create_session()
+
+    def _forward(self, blob):
+        if self.session is not None:
+            return self.session.run(None, {self.input_name: blob})
+        self.model.setInput(blob)
+        return [self.model.forward()]
+
+    def _decode(self, outs, frame_width, frame_height, conf_threshold, class_ids):
+        out = np.squeeze(outs[0], axis=0)
+        output_format = self.output_format
+        if output_format == "auto":
+            # YOLOv8 puts the box/class channels first: (4 + classes, N)
+            output_format = "yolov8" if out.shape[0] < out.shape[1] else "yolov5"
+
+        if output_format == "yolov8":
+            rows = out.T
+            scores = rows[:, 4:]
+        else:
+            rows = out
+            scores = rows[:, 5:] * rows[:, 4:5]
+
+        mask, best_ids, best_scores = self._filter(scores, conf_threshold, class_ids)
+        rows = rows[mask]
+
+        x_factor = frame_width / self.input_size[0]
+        y_factor = frame_height / self.input_size[1]
+        w = (rows[:, 2] * x_factor).astype(int)
+        h = (rows[:, 3] * y_factor).astype(int)
+        x = rows[:, 0] * x_factor - w / 2
+        y = rows[:, 1] * y_factor - h / 2
+        return self._to_lists(x, y, w, h, best_scores[mask], best_ids[mask])
+
+
+BACKENDS = {
+    DarknetBackend.name: DarknetBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def create_backend(name, **kwargs):
+    """
+    Create a detector backend by name
+
+    Args:
+        name (str): Backend name, one of BACKENDS
+        **kwargs: Backend specific arguments
+
+    Returns:
+        DetectorBackend: The created backend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown detector backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
+
+
+def create_backend_from_config(name=None):
+    """Create a backend using the settings in config.py"""
+    name = name or DETECTOR_BACKEND
+    common = {"input_size": (DETECTOR_INPUT_SIZE, DETECTOR_INPUT_SIZE)}
+    if name == DarknetBackend.name:
+        return create_backend(name, weights_file=DARKNET_WEIGHTS_FILE,
+                              config_file=DARKNET_CONFIG_FILE, **common)
+    if name == OnnxBackend.name:
+        return create_backend(name, model_file=ONNX_MODEL_FILE, runtime=ONNX_RUNTIME,
+                              output_format=ONNX_OUTPUT_FORMAT, num_threads=ONNX_NUM_THREADS, **common)
+    return create_backend(name, **common)
@@ -0,0 +1,125 @@
+"""
+Per-frame image processing for the detection loop
+
+All operations write into buffers that are allocated once and reused, so the
+steady-state loop does not allocate a new frame-sized array per iteration.
+"""
+import cv2
+import numpy as np
+
+BRIGHTNESS_MODE_NAMES = {1: "Simple", 2: "Contrast", 3: "HSV"}
+
+
+def adjust_brightness(image, brightness_factor=1.5, dst=None):
+    adjusted = cv2.convertScaleAbs(image, dst, alpha=brightness_factor, beta=0)
+    return adjusted
+
+
+def adjust_brightness_contrast(image, brightness=0, contrast=1.0, dst=None):
+    adjusted = cv2.convertScaleAbs(image, dst, alpha=contrast, beta=brightness)
+    return adjusted
+
+
+def adjust_brightness_hsv(image, value_scale=1.5, dst=None, hsv=None, value=None):
+    # convertScaleAbs đã bão hoà về [0, 255] nên không cần np.clip
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV, dst=hsv)
+    value = cv2.extractChannel(hsv, 2, dst=value)
+    cv2.convertScaleAbs(value, value, alpha=value_scale, beta=0)
+    cv2.insertChannel(value, hsv, 2)
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR, dst=dst)
+
+
+class FramePipeline:
+    """
+    Flip and brightness adjustment with reused buffers
+
+    The frame returned by `process` is an internal buffer that is overwritten
+    on the next call; copy it if it must outlive the current iteration.
+
+    With `inference_size` set (dual-resolution mode) the captured frame is
+    downsized once and all per-frame work runs on the small frame; the
+    full-resolution captures are only kept in a short ring buffer and touched
+    by `evidence_frame` when an alert needs them.
+    """
+    def __init__(self, flip=True, inference_size=None, full_res_frames=2):
+        """
+        Args:
+            flip (bool): Mirror frames horizontally
+            inference_size (tuple): (width, height) of the processed frame, None keeps the capture size
+            full_res_frames (int): Full-resolution captures kept for evidence in dual-resolution mode
+        """
+        self.flip = flip
+        self.inference_size = tuple(inference_size) if inference_size else None
+        self._captures = [None] * (full_res_frames if self.inference_size else 1)
+        self._capture_index = 0
+        self._latest_capture = None
+        self._small = None
+        self._frame = None
+        self._hsv = None
+        self._value = None
+
+    def _ensure_buffers(self, shape):
+        if self._frame is None or self._frame.shape != shape:
+            self._frame = np.empty(shape, dtype=np.uint8)
+            self._small = np.empty(shape, dtype=np.uint8)
+            self._hsv = np.empty(shape, dtype=np.uint8)
+            self._value = np.empty(shape[:2], dtype=np.uint8)
+
+    def capture_buffer(self):
+        """Buffer to pass to VideoCapture.read() for the next frame (None until allocated)"""
+        return self._captures[self._capture_index]
+
+    def process(self, frame, brightness_mode=1, brightness_factor=1.5):
+        """
+        Flip the captured frame and apply the active brightness mode
+
+        Args:
+            frame (numpy.ndarray): Captured BGR frame, left untouched
+            brightness_mode (int): 1: simple, 2: contrast-brightness, 3: HSV
+            brightness_factor (float): Brightness/contrast factor
+
+        Returns:
+            numpy.ndarray: The processed frame (reused buffer)
+        """
+        # Giữ frame gốc trong ring buffer (VideoCapture.read ghi thẳng vào đó)
+        self._captures[self._capture_index] = frame
+        self._latest_capture = frame
+        self._capture_index = (self._capture_index + 1) % len(self._captures)
+
+        if self.inference_size:
+            width, height = self.inference_size
+            self._ensure_buffers((height, width, frame.shape[2]))
+            frame = cv2.resize(frame, (width, height), dst=self._small, interpolation=cv2.INTER_AREA)
+        else:
+            self._ensure_buffers(frame.shape)
+
+        out = self._frame
+        if self.flip:
+            cv2.flip(frame, 1, dst=out)
+        else:
+            np.copyto(out, frame)
+
+        if brightness_mode == 1:
+            adjust_brightness(out, brightness_factor, dst=out)
+        elif brightness_mode == 2:
+            adjust_brightness_contrast(out, 10, brightness_factor, dst=out)
+        elif brightness_mode == 3:
+            adjust_brightness_hsv(out, brightness_factor, dst=out, hsv=self._hsv, value=self._value)
+        return out
+
+    def evidence_frame(self):
+        """
+        Flipped copy of the latest full-resolution capture, for alert snapshots
+
+        Returns:
+            tuple: (image, scale_x, scale_y) where scale maps processed-frame
+                   coordinates to the image, or (None, 1, 1) before the first frame
+        """
+        capture = self._latest_capture
+        if capture is None:
+            return None, 1.0, 1.0
+        image = cv2.flip(capture, 1) if self.flip else capture.copy()
+        if not self.inference_size:
+            return image, 1.0, 1.0
+        width, height = self.inference_size
+        return image, capture.shape[1] / width, capture.shape[0] / height
@@ -0,0 +1,132 @@
+"""
+Intrusion event state machine
+
+Turns the per-frame "people inside the zone" count into discrete intrusion
+start/end events. Enter dwell, exit grace and minimum hold times keep a single
+missed or spurious detection from toggling the LED and triggering alerts.
+"""
+import datetime
+from collections import namedtuple
+
+IntrusionEvent = namedtuple("IntrusionEvent", ["kind", "event_id", "zone_id", "timestamp"])
+
+EVENT_START = "start"
+EVENT_END = "end"
+
+STATE_IDLE = "idle"          # Không có người trong vùng
+STATE_PENDING = "pending"    # Có người, đang chờ đủ thời gian enter dwell
+STATE_ACTIVE = "active"      # Đang xâm nhập
+STATE_CLEARING = "clearing"  # Vùng trống, đang chờ hết exit grace / min hold
+
+
+class ZoneIntrusionTracker:
+    """Intrusion state for a single zone"""
+    def __init__(self, zone_id, enter_dwell=1.0, exit_grace=3.0, min_hold=5.0):
+        """
+        Args:
+            zone_id (str): Zone identifier used in event IDs
+            enter_dwell (float): Seconds the zone must stay occupied before an intrusion starts
+            exit_grace (float): Seconds the zone must stay empty before an intrusion ends
+            min_hold (float): Minimum seconds an intrusion lasts once started
+        """
+        self.zone_id = zone_id
+        self.enter_dwell = enter_dwell
+        self.exit_grace = exit_grace
+        self.min_hold = min_hold
+        self.state = STATE_IDLE
+        self.event_id = None
+        self._sequence = 0
+        self._pending_since = None
+        self._clear_since = None
+        self._started_at = None
+
+    @property
+    def active(self):
+        """True while an intrusion event is open"""
+        return self.state in (STATE_ACTIVE, STATE_CLEARING)
+
+    def _new_event_id(self, now):
+        self._sequence += 1
+        stamp = datetime.datetime.fromtimestamp(now).strftime("%Y%m%d_%H%M%S")
+        return f"{self.zone_id}_{stamp}_{self._sequence}"
+
+    def update(self, people_count, now):
+        """
+        Feed the people count for the current frame
+
+        Args:
+            people_count (int): Number of people inside the zone
+            now (float): Current time in seconds (time.time())
+
+        Returns:
+            IntrusionEvent: A start/end event, or None if nothing changed
+        """
+        occupied = people_count > 0
+
+        if self.state == STATE_IDLE and occupied:
+            self.state = STATE_PENDING
+            self._pending_since = now
+
+        if self.state == STATE_PENDING:
+            if not occupied:
+                self.state = STATE_IDLE
+            elif now - self._pending_since >= self.enter_dwell:
+                self.state = STATE_ACTIVE
+                self._started_at = now
+                self.event_id = self._new_event_id(now)
+                return IntrusionEvent(EVENT_START, self.event_id, self.zone_id, now)
+            return None
+
+        if self.state == STATE_ACTIVE and not occupied:
+            self.state = STATE_CLEARING
+            self._clear_since = now
+
+        if self.state == STATE_CLEARING:
+            if occupied:
+                self.state = STATE_ACTIVE
+            elif (now - self._clear_since >= self.exit_grace
+                  and now - self._started_at >= self.min_hold):
+                event = IntrusionEvent(EVENT_END, self.event_id, self.zone_id, now)
+                self.state = STATE_IDLE
+                self.event_id = None
+                return event
+        return None
+
+
+class IntrusionStateMachine:
+    """Intrusion trackers for all zones, created on first use"""
+    def __init__(self, enter_dwell=1.0, exit_grace=3.0, min_hold=5.0):
+        self.enter_dwell = enter_dwell
+        self.exit_grace = exit_grace
+        self.min_hold = min_hold
+        self.zones = {}
+
+    def tracker(self, zone_id):
+        if zone_id not in self.zones:
+            self.zones[zone_id] = ZoneIntrusionTracker(zone_id, self.enter_dwell, self.exit_grace, self.min_hold)
+        return self.zones[zone_id]
+
+    def update(self, zone_counts, now):
+        """
+        Feed the people count of every zone
+
+        Args:
+            zone_counts (dict): zone_id -> people inside
+            now (float): Current time in seconds
+
+        Returns:
+            list: IntrusionEvent objects emitted by this update
+        """
+        events = []
+        for zone_id, count in zone_counts.items():
+            event = self.tracker(zone_id).update(count, now)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def reset(self, zone_id, now):
+        """Close an open intrusion for a zone (e.g. when the zone is redefined)"""
+        tracker = self.zones.pop(zone_id, None)
+        if tracker is not None and tracker.active:
+            return IntrusionEvent(EVENT_END, tracker.event_id, zone_id, now)
+        return None
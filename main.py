@@ -1,28 +1,26 @@
 import cv2
-import numpy as np
 import time
 import signal
 import sys
 from mqtt_client import EraMqttClient
-from config import MQTT_BROKER, MQTT_PORT, MQTT_TOKEN, DEVICE_UID
+from config import (MQTT_BROKER, MQTT_PORT, MQTT_TOKEN, DEVICE_UID, DETECTION_INTERVAL_SECONDS,
+                    STREAM_ENABLED, STREAM_HOST, STREAM_PORT, STREAM_MAX_FPS, STREAM_JPEG_QUALITY,
+                    GOVERNOR_ENABLED, THERMAL_ZONE_PATH, LOADAVG_PATH, GOVERNOR_LEVELS, GOVERNOR_TEMP_HIGH_C,
+                    GOVERNOR_TEMP_LOW_C, GOVERNOR_LATENCY_TARGET_SECONDS, GOVERNOR_POLL_SECONDS,
+                    GOVERNOR_STEP_UP_SECONDS,
+                    DUAL_RESOLUTION_ENABLED, INFERENCE_FRAME_SIZE, FULL_RES_BUFFER_FRAMES, ZONES_DIR, CAMERA_ID)
 from yolodetect import YoloDetect
 from captureDrive import DriveUploader
+from frame_pipeline import FramePipeline, BRIGHTNESS_MODE_NAMES
+from runtime_config import RuntimeConfig, make_ack
+from mjpeg_stream import FrameBroadcaster, start_stream_server
+from thermal_governor import ThermalGovernor
+from overlay import OverlayCompositor
+from zone_store import ZoneStore, ZoneGeometry
 
-def adjust_brightness(image, brightness_factor=1.5):
-    adjusted = cv2.convertScaleAbs(image, alpha=brightness_factor, beta=0)
-    return adjusted
-
-def adjust_brightness_contrast(image, brightness=0, contrast=1.0):
-    adjusted = cv2.convertScaleAbs(image, alpha=contrast, beta=brightness)
-    return adjusted
-
-def adjust_brightness_hsv(image, value_scale=1.5):
-    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-    h, s, v = cv2.split(hsv)
-    v = cv2.convertScaleAbs(v, alpha=value_scale, beta=0)
-    v = np.clip(v, 0, 255).astype('uint8')
-    hsv = cv2.merge([h, s, v])
-    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+WINDOW_NAME = "Intrusion Warning"
+START_HINT_LABEL = ("Define area and press 'd' to start detection", (10, 30), 0.45, (0, 0, 255), 2)
+FPS_LABEL_INTERVAL_SECONDS = 1.0  # Refresh the displayed FPS value about once a second
 
 class FPS:
     def __init__(self):
@@ -83,6 +81,10 @@ def main():
         token=MQTT_TOKEN,
         device_uid=DEVICE_UID
     )
+
+    # Lệnh cấu hình từ topic down được kiểm tra và xếp hàng, áp dụng giữa các frame
+    runtime_config = RuntimeConfig()
+    mqtt_client.command_handler = runtime_config.submit
     
     # Connect to MQTT broker
     mqtt_connected = mqtt_client.connect()
@@ -100,6 +102,7 @@ def main():
 
     # Initialize Yolo model for person detection and pass MQTT client to it
     model = YoloDetect(detect_class="person", mqtt_client=mqtt_client)
+    runtime_config.dynamic_input_size = model.backend.supports_dynamic_input
 
     # Brightness control parameters
     brightness_factor = 1.5  # Default brightness factor
@@ -119,16 +122,10 @@ def main():
             points.append([x, y])
             print(f"Point added: [{x}, {y}]")
 
-    def draw_polygon(frame, points):
-        for point in points:
-            frame = cv2.circle(frame, (point[0], point[1]), 5, (0, 0, 255), -1)
-        
-        if len(points) > 1:
-            frame = cv2.polylines(frame, [np.int32(points)], False, (255, 0, 0), thickness=2)
-        
-        return frame
-
     detect = False
+    detect_interval = DETECTION_INTERVAL_SECONDS  # Giây giữa hai lần chạy model
+    last_detect_time = 0
+    people_count = 0
 
     print("\nHướng dẫn sử dụng:")
     print("- Nhấp chuột trái để chọn các điểm của vùng giám sát")
@@ -148,55 +145,149 @@ def main():
         return
     
     print("Webcam initialized successfully!")
+
+    # Live view MJPEG: mã hoá JPEG một lần, phát cho mọi client
+    broadcaster = None
+    if STREAM_ENABLED:
+        broadcaster = FrameBroadcaster(max_fps=STREAM_MAX_FPS, jpeg_quality=STREAM_JPEG_QUALITY)
+        start_stream_server(broadcaster, host=STREAM_HOST, port=STREAM_PORT)
+        print(f"Live view: http://{STREAM_HOST}:{STREAM_PORT}/stream.mjpg")
+    
+    # Bộ điều tiết theo nhiệt độ / tải CPU / độ trễ phát hiện
+    governor = None
+    if GOVERNOR_ENABLED:
+        governor = ThermalGovernor(
+            temp_path=THERMAL_ZONE_PATH,
+            loadavg_path=LOADAVG_PATH,
+            levels=GOVERNOR_LEVELS,
+            base={"detect_interval": DETECTION_INTERVAL_SECONDS, "input_size": model.backend.input_size[0]},
+            dynamic_input=model.backend.supports_dynamic_input,
+            temp_high=GOVERNOR_TEMP_HIGH_C,
+            temp_low=GOVERNOR_TEMP_LOW_C,
+            latency_target=GOVERNOR_LATENCY_TARGET_SECONDS,
+            poll_interval=GOVERNOR_POLL_SECONDS,
+            step_up_after=GOVERNOR_STEP_UP_SECONDS
+        )
+        settings = governor.settings()
+        model.apply_settings(settings)
+        detect_interval = settings["detect_interval"]
+        model.backend.set_num_threads(settings["num_threads"])
     
     # Initialize FPS counter
     fps = FPS().start()
+    # Chữ FPS chỉ cập nhật mỗi giây để patch overlay không phải vẽ lại mỗi frame
+    fps_label = "FPS: 0.0"
+    last_fps_label_time = 0
+
+    # Buffer dùng lại cho mỗi frame (lật, độ sáng, vẽ vùng)
+    # Chế độ hai độ phân giải: xử lý trên frame nhỏ, frame gốc chỉ dùng làm ảnh bằng chứng
+    if DUAL_RESOLUTION_ENABLED:
+        pipeline = FramePipeline(flip=True, inference_size=INFERENCE_FRAME_SIZE,
+                                 full_res_frames=FULL_RES_BUFFER_FRAMES)
+        model.evidence_source = pipeline.evidence_frame
+    else:
+        pipeline = FramePipeline(flip=True)
+
+    # Lớp overlay tĩnh (vùng giám sát, nhãn) và chữ HUD được cache, chỉ vẽ lại khi thay đổi
+    overlay = OverlayCompositor()
+
+    # Vùng giám sát được lưu theo camera cùng hình học tính sẵn (ROI, mask, diện tích)
+    capture_size = (int(video_cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video_cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    frame_size = tuple(INFERENCE_FRAME_SIZE) if DUAL_RESOLUTION_ENABLED else capture_size
+    zone_store = ZoneStore(ZONES_DIR, CAMERA_ID)
+
+    def save_zone(zone_points):
+        zone = ZoneGeometry.from_points(zone_points, frame_size)
+        model.set_zone(zone)
+        try:
+            zone_store.save({model.zone_id: zone}, frame_size, capture_size)
+        except Exception as e:
+            print(f"Lỗi lưu vùng giám sát: {e}")
+
+    saved_zones = zone_store.load(frame_size, capture_size)
+    if model.zone_id in saved_zones:
+        points = saved_zones[model.zone_id].points
+        model.set_zone(saved_zones[model.zone_id])
+        detect = True
+        print("Restored saved monitoring area. Monitoring for intrusions...")
+
+    # Tạo cửa sổ và đăng ký callback chuột một lần
+    cv2.namedWindow(WINDOW_NAME)
+    cv2.setMouseCallback(WINDOW_NAME, handle_left_click, None)
     
     while True:
-        ret, frame = video_cap.read()
-        if not ret or frame is None:
+        ret, captured = video_cap.read(pipeline.capture_buffer())
+        if not ret or captured is None:
             print("Lỗi đọc frame, thử lại...")
             time.sleep(0.1)
             continue
+
+        # Áp dụng lệnh cấu hình nhận từ E-Ra mà không cần khởi động lại
+        for command_id, settings in runtime_config.drain():
+            applied = model.apply_settings(settings)
+            if "detect_interval" in settings:
+                detect_interval = settings["detect_interval"]
+                applied.append("detect_interval")
+            if "brightness_factor" in settings:
+                brightness_factor = settings["brightness_factor"]
+                applied.append("brightness_factor")
+            if "brightness_mode" in settings:
+                brightness_mode = settings["brightness_mode"]
+                applied.append("brightness_mode")
+            if governor is not None and ("detect_interval" in settings or "input_size" in settings):
+                # Giá trị từ xa thành mức cơ sở; bộ điều tiết chỉ làm nhẹ hơn, không ghi đè
+                base = {name: settings[name] for name in ("detect_interval", "input_size") if name in settings}
+                level_settings = governor.set_base(**base)
+                model.apply_settings(level_settings)
+                detect_interval = level_settings["detect_interval"]
+            if "zone" in settings:
+                model.reset_zone()
+                points = settings["zone"] + [settings["zone"][0]]
+                detect = True
+                save_zone(points)
+                applied.append("zone")
+            print(f"Applied remote settings {command_id}: {settings}")
+            mqtt_client.publish_command_ack(make_ack(command_id, "ok", applied))
+
+        # Điều chỉnh tần suất phát hiện, kích thước input và số luồng khi Pi nóng / quá tải
+        if governor is not None:
+            settings = governor.poll(time.time())
+            if settings is not None:
+                model.apply_settings(settings)
+                detect_interval = settings["detect_interval"]
+                model.backend.set_num_threads(settings["num_threads"])
+                print(f"Governor level {governor.level} (temp: {governor.temperature}, "
+                      f"load: {governor.load}, latency: {governor.latency}): {settings}")
         
-        # Lật frame theo chiều ngang cho tự nhiên hơn
-        frame = cv2.flip(frame, 1)
+        # Thu nhỏ (nếu bật), lật frame theo chiều ngang và điều chỉnh độ sáng (ghi vào buffer dùng lại)
+        frame = pipeline.process(captured, brightness_mode, brightness_factor)
         
         # Cập nhật FPS
         fps.update()
         fps.stop()
-        
-        # Hiển thị FPS
-        cv2.putText(frame, f"FPS: {fps.fps():.2f}", 
-                    (10, frame.shape[0] - 60), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        fps_value = fps.fps()
+        if time.time() - last_fps_label_time >= FPS_LABEL_INTERVAL_SECONDS:
+            fps_label = f"FPS: {fps_value:.1f}"
+            last_fps_label_time = time.time()
         
         # Reset FPS định kỳ
         if fps._numFrames % 100 == 0:
             fps = FPS().start()
         
-        # Điều chỉnh độ sáng
-        if brightness_mode == 1:
-            frame = adjust_brightness(frame, brightness_factor)
-        elif brightness_mode == 2:
-            frame = adjust_brightness_contrast(frame, 10, brightness_factor)
-        elif brightness_mode == 3:
-            frame = adjust_brightness_hsv(frame, brightness_factor)
-        
-        # Vẽ vùng giám sát
-        frame = draw_polygon(frame, points)
-        
         # Xử lý phát hiện đối tượng
         if detect:
-            frame, people_count = model.detect(frame=frame, points=points)
+            now = time.time()
+            if now - last_detect_time >= detect_interval:
+                frame, people_count = model.detect(frame=frame, points=points)
+                last_detect_time = now
+                if governor is not None:
+                    governor.report_latency(time.time() - now)
+            else:
+                # Frame không chạy model: vẽ lại box / ALARM gần nhất để hiển thị không bị nhấp nháy
+                model.draw_last_detections(frame)
             
-            # HIỂN THỊ SỐ NGƯỜI LÊN MÀN HÌNH
-            cv2.putText(frame, f"People in area: {people_count}", 
-                        (10, 80),  # Vị trí (góc trên bên trái)
-                        cv2.FONT_HERSHEY_SIMPLEX, 
-                        0.7,  # Kích thước font
-                        (0, 255, 0),  # Màu xanh lá
-                        2)
+            # HIỂN THỊ SỐ NGƯỜI LÊN MÀN HÌNH (góc trên bên trái, màu xanh lá)
+            overlay.text(frame, "people", f"People in area: {people_count}", (10, 80), 0.7, (0, 255, 0), 2)
         
         # Xử lý phím
         key = cv2.waitKey(1)
@@ -205,10 +296,13 @@ def main():
         elif key == ord('d') and len(points) >= 3:
             points.append(points[0])
             detect = True
+            save_zone(points)
             print("Detection started. Monitoring for intrusions...")
         elif key == ord('r'):
             points = []
             detect = False
+            model.reset_zone()
+            zone_store.clear()
             print("Reset monitoring area. Please define a new area.")
         elif key == ord('+') or key == ord('='):
             brightness_factor += 0.1
@@ -222,25 +316,25 @@ def main():
             print(f"Brightness factor: {brightness_factor:.1f}")
         elif key == ord('m'):
             brightness_mode = (brightness_mode % 3) + 1
-            mode_names = {1: "Simple", 2: "Contrast-Brightness", 3: "HSV"}
-            print(f"Brightness mode: {mode_names[brightness_mode]}")
+            print(f"Brightness mode: {BRIGHTNESS_MODE_NAMES[brightness_mode]}")
         
-        # Hiển thị trạng thái
-        if not detect:
-            cv2.putText(frame, "Define area and press 'd' to start detection", 
-                       (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 255), 2)
+        # Vẽ vùng giám sát và nhãn tĩnh (sau khi phát hiện để model nhận frame sạch)
+        overlay.compose(frame, points, () if detect else (START_HINT_LABEL,))
         
-        mode_names = {1: "Simple", 2: "Contrast", 3: "HSV"}
-        cv2.putText(frame, f"Brightness: {brightness_factor:.1f} | Mode: {mode_names[brightness_mode]}", 
-                   (10, frame.shape[0] - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+        # Hiển thị trạng thái
+        height = frame.shape[0]
+        overlay.text(frame, "fps", fps_label, (10, height - 60), 0.5, (255, 255, 255))
+        overlay.text(frame, "brightness",
+                     f"Brightness: {brightness_factor:.1f} | Mode: {BRIGHTNESS_MODE_NAMES[brightness_mode]}",
+                     (10, height - 30), 0.45, (255, 255, 255))
         
         mqtt_status = "Connected" if mqtt_client.connected else "Disconnected"
-        cv2.putText(frame, f"MQTT: {mqtt_status}", 
-                   (10, frame.shape[0] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.45, 
-                   (0, 255, 0) if mqtt_client.connected else (0, 0, 255), 1)
+        overlay.text(frame, "mqtt", f"MQTT: {mqtt_status}", (10, height - 10), 0.45,
+                     (0, 255, 0) if mqtt_client.connected else (0, 0, 255))
         
-        cv2.imshow("Intrusion Warning", frame)
-        cv2.setMouseCallback('Intrusion Warning', handle_left_click, None)
+        cv2.imshow(WINDOW_NAME, frame)
+        if broadcaster is not None:
+            broadcaster.submit(frame)
 
     # Dọn dẹp tài nguyên
     mqtt_client.disconnect()
@@ -0,0 +1,183 @@
+"""
+Live MJPEG view of the annotated detection frames
+
+The detection loop hands frames to a FrameBroadcaster, which JPEG-encodes at
+most one frame per interval on its own thread. Every HTTP client is served the
+same encoded bytes; slow clients simply skip to the newest frame. Nothing is
+encoded while no MJPEG client or snapshot request is waiting.
+"""
+import threading
+import time
+import cv2
+import numpy as np
+from flask import Flask, Response, request
+
+BOUNDARY = b"frame"
+
+
+class FrameBroadcaster:
+    """Encode-once JPEG fan-out for any number of MJPEG clients"""
+    def __init__(self, max_fps=10, jpeg_quality=70):
+        """
+        Args:
+            max_fps (float): Upper bound on encoded frames per second
+            jpeg_quality (int): JPEG quality (0-100)
+        """
+        self.max_fps = max_fps
+        self.jpeg_quality = jpeg_quality
+        self._lock = threading.Lock()
+        self._frame_ready = threading.Condition(self._lock)
+        self._jpeg_ready = threading.Condition(self._lock)
+        self._pending = None      # Frame copied from the detection loop
+        self._working = None      # Frame being encoded
+        self._has_pending = False
+        self._jpeg = None
+        self._sequence = 0
+        self._last_submit = 0.0
+        self.clients = 0
+        self._snapshot_waiters = 0
+        self.encoded_frames = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame):
+        """
+        Offer an annotated frame from the detection loop
+
+        Never blocks: the frame is dropped when nobody is watching, when the
+        rate cap has not elapsed or when the encoder is swapping buffers.
+        """
+        if self.clients == 0 and self._snapshot_waiters == 0:
+            return False
+        now = time.monotonic()
+        if now - self._last_submit < 1.0 / self.max_fps:
+            return False
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if self._pending is None or self._pending.shape != frame.shape:
+                self._pending = np.empty_like(frame)
+            np.copyto(self._pending, frame)
+            self._has_pending = True
+            self._last_submit = now
+            self._frame_ready.notify()
+        finally:
+            self._lock.release()
+        return True
+
+    def _encode_loop(self):
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), int(self.jpeg_quality)]
+        while self._running:
+            with self._lock:
+                while not self._has_pending and self._running:
+                    self._frame_ready.wait(timeout=1.0)
+                if not self._running:
+                    break
+                # Đổi buffer để vòng lặp phát hiện có thể ghi frame mới ngay
+                self._pending, self._working = self._working, self._pending
+                self._has_pending = False
+
+            ok, encoded = cv2.imencode(".jpg", self._working, params)
+            if not ok:
+                continue
+            with self._lock:
+                self._jpeg = encoded.tobytes()
+                self._sequence += 1
+                self.encoded_frames += 1
+                self._jpeg_ready.notify_all()
+
+    def latest(self):
+        """Return the most recent JPEG bytes, or None"""
+        with self._lock:
+            return self._jpeg
+
+    def snapshot(self, timeout=2.0):
+        """
+        Wait for a freshly encoded JPEG (the request counts as demand meanwhile)
+
+        Args:
+            timeout (float): Seconds to wait before falling back to the latest JPEG
+
+        Returns:
+            bytes: JPEG bytes, or None if nothing was ever encoded
+        """
+        with self._lock:
+            sequence = self._sequence
+            self._snapshot_waiters += 1
+            try:
+                self._jpeg_ready.wait_for(lambda: self._sequence != sequence or not self._running,
+                                          timeout=timeout)
+                return self._jpeg
+            finally:
+                self._snapshot_waiters -= 1
+
+    def stream(self, max_fps=None):
+        """
+        Generator of multipart MJPEG chunks for one client
+
+        Args:
+            max_fps (float): Optional per-client cap below the broadcaster rate
+        """
+        min_interval = 1.0 / max_fps if max_fps else 0.0
+        last_sequence = 0
+        last_sent = 0.0
+        with self._lock:
+            self.clients += 1
+        try:
+            while self._running:
+                with self._lock:
+                    # Client chậm chỉ nhận frame mới nhất, các frame ở giữa bị bỏ qua
+                    self._jpeg_ready.wait_for(lambda: self._sequence != last_sequence or not self._running,
+                                              timeout=5.0)
+                    if self._sequence == last_sequence:
+                        continue
+                    jpeg, last_sequence = self._jpeg, self._sequence
+
+                now = time.monotonic()
+                if now - last_sent < min_interval:
+                    continue
+                last_sent = now
+                yield (b"--" + BOUNDARY + b"\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                       + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n")
+        finally:
+            with self._lock:
+                self.clients -= 1
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._frame_ready.notify_all()
+            self._jpeg_ready.notify_all()
+
+
+def create_stream_app(broadcaster):
+    """Flask app serving /stream.mjpg and /snapshot.jpg from a broadcaster"""
+    app = Flask(__name__)
+
+    @app.route('/stream.mjpg')
+    def stream():
+        max_fps = request.args.get('fps', default=None, type=float)
+        return Response(broadcaster.stream(max_fps),
+                        mimetype="multipart/x-mixed-replace; boundary=" + BOUNDARY.decode())
+
+    @app.route('/snapshot.jpg')
+    def snapshot():
+        jpeg = broadcaster.snapshot()
+        if jpeg is None:
+            return Response(status=204)
+        return Response(jpeg, mimetype="image/jpeg")
+
+    return app
+
+
+def start_stream_server(broadcaster, host="0.0.0.0", port=8080):
+    """Run the stream app on a daemon thread inside the detector process"""
+    app = create_stream_app(broadcaster)
+    thread = threading.Thread(
+        target=app.run,
+        kwargs={"host": host, "port": port, "threaded": True, "use_reloader": False},
+        daemon=True
+    )
+    thread.start()
+    return thread
@@ -30,6 +30,8 @@ class EraMqttClient:
         self.device_uid = device_uid
         self.client = mqtt.Client()
         self.connected = False
+        # Hàm xử lý lệnh từ topic down: nhận payload dict, trả về ack (dict) hoặc None
+        self.command_handler = None
         
         # Set callbacks
         self.client.on_connect = self._on_connect
@@ -98,8 +100,17 @@ class EraMqttClient:
             payload = json.loads(msg.payload.decode('utf-8'))
             logger.info(f"Received message on topic {msg.topic}: {payload}")
             
-            # Handle incoming control messages here
-            # This can be expanded based on your application needs
+            # Only settings commands are handled here; other control messages from
+            # the platform are not ours to acknowledge
+            if not isinstance(payload, dict) or "settings" not in payload:
+                logger.debug(f"Ignoring message without settings on topic {msg.topic}")
+                return
+
+            # Forward settings commands to the application (runtime reconfiguration)
+            if self.command_handler is not None:
+                ack = self.command_handler(payload)
+                if ack is not None:
+                    self.publish_command_ack(ack)
         except Exception as e:
             logger.error(f"Error processing received message: {e}")
 
@@ -181,12 +192,13 @@ class EraMqttClient:
             logger.error(f"Lỗi gửi trạng thái LED: {e}")
             return False
         
-    def publish_intrusion_alert(self, alert_state=1):
+    def publish_intrusion_alert(self, alert_state=1, event_id=None):
         """
         Publish intrusion alert to E-Ra platform
         
         Args:
             alert_state (int): 1 for alarm activated, 0 for deactivated
+            event_id (str): Intrusion event ID shared with the snapshot uploads
         
         Returns:
             bool: True if published successfully, False otherwise
@@ -201,6 +213,8 @@ class EraMqttClient:
             
             # Create the payload - when intrusion detected, set alarm to 1
             payload = {"config_led": alert_state}
+            if event_id is not None:
+                payload["config_event_id"] = event_id
             
             # Publish message
             result = self.client.publish(topic, json.dumps(payload), qos=1)
@@ -247,4 +261,95 @@ class EraMqttClient:
                 
         except Exception as e:
             logger.error(f"Error publishing people count: {e}")
+            return False
+
+    def publish_occupancy_summary(self, summary):
+        """
+        Publish a windowed occupancy summary to E-Ra platform
+        
+        Args:
+            summary (dict): Per-zone min/max/mean/dwell and hottest heatmap cells
+            
+        Returns:
+            bool: True if published successfully, False otherwise
+        """
+        if not self.connected or not self.token or not self.device_uid:
+            logger.error("Cannot publish occupancy summary: Not connected or missing credentials")
+            return False
+            
+        try:
+            topic = f"eoh/chip/{self.token}/third_party/{self.device_uid}/data"
+            payload = {"config_occupancy": summary}
+            
+            result = self.client.publish(topic, json.dumps(payload, separators=(",", ":")), qos=1)
+            result.wait_for_publish()
+            
+            if result.rc == 0:
+                logger.info(f"Published occupancy summary to {topic}: {payload}")
+                return True
+            else:
+                logger.error(f"Failed to publish occupancy summary, error code: {result.rc}")
+                return False
+                
+        except Exception as e:
+            logger.error(f"Error publishing occupancy summary: {e}")
+            return False
+
+    def publish_snapshot_stats(self, stats):
+        """
+        Publish alert snapshot counters (sent / suppressed as near-duplicates) to E-Ra platform
+        
+        Args:
+            stats (dict): Counters from SnapshotDeduplicator.stats()
+            
+        Returns:
+            bool: True if published successfully, False otherwise
+        """
+        if not self.connected or not self.token or not self.device_uid:
+            logger.error("Cannot publish snapshot stats: Not connected or missing credentials")
+            return False
+            
+        try:
+            topic = f"eoh/chip/{self.token}/third_party/{self.device_uid}/data"
+            payload = {"config_snapshots": stats}
+            
+            result = self.client.publish(topic, json.dumps(payload, separators=(",", ":")), qos=1)
+            result.wait_for_publish()
+            
+            if result.rc == 0:
+                logger.info(f"Published snapshot stats to {topic}: {payload}")
+                return True
+            else:
+                logger.error(f"Failed to publish snapshot stats, error code: {result.rc}")
+                return False
+                
+        except Exception as e:
+            logger.error(f"Error publishing snapshot stats: {e}")
+            return False
+
+    def publish_command_ack(self, ack):
+        """
+        Publish a control command acknowledgement to E-Ra platform
+        
+        Args:
+            ack (dict): Acknowledgement with command id, status and applied settings
+            
+        Returns:
+            bool: True if the message was queued, False otherwise
+        """
+        if not self.connected or not self.token or not self.device_uid:
+            logger.error("Cannot publish command ack: Not connected or missing credentials")
+            return False
+            
+        try:
+            topic = f"eoh/chip/{self.token}/third_party/{self.device_uid}/data"
+            payload = {"config_ack": ack}
+            
+            # Không chờ wait_for_publish để không chặn vòng lặp phát hiện
+            result = self.client.publish(topic, json.dumps(payload), qos=1)
+            logger.info(f"Published command ack to {topic}: {payload}")
+            return result.rc == 0
+                
+        except Exception as e:
+            logger.error(f"Error publishing command ack: {e}")
             return False
\ No newline at end of file
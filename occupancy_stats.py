@@ -0,0 +1,119 @@
+"""
+Occupancy statistics aggregated over fixed time windows
+
+Accumulates person centroids into a coarse heatmap and keeps per-zone
+min/max/mean/dwell statistics, so one compact summary per window can be
+published instead of a raw people count every second.
+"""
+import numpy as np
+
+# Chỉ số trong mảng thống kê của mỗi vùng
+_MIN, _MAX, _PERSON_SECONDS, _DWELL, _SECONDS = range(5)
+
+
+class OccupancyAccumulator:
+    """Windowed occupancy heatmap and per-zone count statistics"""
+    def __init__(self, window_seconds=60, grid_size=(16, 9), max_sample_gap=5.0, top_cells=16):
+        """
+        Args:
+            window_seconds (float): Length of one summary window
+            grid_size (tuple): Heatmap size as (columns, rows)
+            max_sample_gap (float): Longest gap between samples counted towards dwell
+            top_cells (int): Number of hottest heatmap cells included in a summary
+        """
+        self.window_seconds = window_seconds
+        self.grid_size = tuple(grid_size)
+        self.max_sample_gap = max_sample_gap
+        self.top_cells = top_cells
+        columns, rows = self.grid_size
+        self.heatmap = np.zeros((rows, columns), dtype=np.uint32)  # Cửa sổ hiện tại
+        self.total_heatmap = np.zeros((rows, columns), dtype=np.uint64)  # Tích luỹ từ lúc chạy
+        self._zones = {}
+        self._window_start = None
+        self._last_sample = None
+
+    def _zone_stats(self, zone_id):
+        stats = self._zones.get(zone_id)
+        if stats is None:
+            stats = np.array([np.inf, 0, 0, 0, 0], dtype=np.float64)
+            self._zones[zone_id] = stats
+        return stats
+
+    def add(self, now, zone_counts, centroids=(), frame_size=(1280, 720)):
+        """
+        Add one detection sample
+
+        Args:
+            now (float): Sample time in seconds (time.time())
+            zone_counts (dict): zone_id -> people inside the zone
+            centroids (list): (x, y) centroids of every detected person
+            frame_size (tuple): Frame size as (width, height) used to map centroids to cells
+        """
+        if self._window_start is None:
+            self._window_start = now
+        elapsed = 0.0
+        if self._last_sample is not None:
+            elapsed = min(max(now - self._last_sample, 0.0), self.max_sample_gap)
+        self._last_sample = now
+
+        for zone_id, count in zone_counts.items():
+            stats = self._zone_stats(zone_id)
+            stats[_MIN] = min(stats[_MIN], count)
+            stats[_MAX] = max(stats[_MAX], count)
+            stats[_PERSON_SECONDS] += count * elapsed
+            stats[_SECONDS] += elapsed
+            if count > 0:
+                stats[_DWELL] += elapsed
+
+        if len(centroids):
+            points = np.asarray(centroids, dtype=np.float64).reshape(-1, 2)
+            columns, rows = self.grid_size
+            col = np.clip((points[:, 0] * columns / frame_size[0]).astype(int), 0, columns - 1)
+            row = np.clip((points[:, 1] * rows / frame_size[1]).astype(int), 0, rows - 1)
+            np.add.at(self.heatmap, (row, col), 1)
+
+    def ready(self, now):
+        """True once the current window is complete"""
+        return self._window_start is not None and now - self._window_start >= self.window_seconds
+
+    def summary(self, now):
+        """
+        Build the compact summary for the current window and start a new one
+
+        Returns:
+            dict: {"start", "duration", "zones": {zone_id: {min, max, mean, dwell}},
+                   "heat": {"grid": [columns, rows], "cells": [[index, count], ...]}}
+        """
+        start = self._window_start if self._window_start is not None else now
+        duration = now - start
+        zones = {}
+        for zone_id, stats in self._zones.items():
+            seconds = stats[_SECONDS]
+            zones[zone_id] = {
+                "min": int(stats[_MIN]) if np.isfinite(stats[_MIN]) else 0,
+                "max": int(stats[_MAX]),
+                "mean": round(stats[_PERSON_SECONDS] / seconds, 2) if seconds > 0 else float(stats[_MAX]),
+                "dwell": round(stats[_DWELL], 1),
+            }
+
+        # Chỉ gửi các ô nóng nhất của heatmap (chỉ số ô theo hàng, số lần xuất hiện)
+        flat = self.heatmap.ravel()
+        hottest = np.argsort(flat)[::-1][:self.top_cells]
+        cells = [[int(i), int(flat[i])] for i in hottest if flat[i] > 0]
+
+        result = {
+            "start": int(start),
+            "duration": round(duration, 1),
+            "zones": zones,
+            "heat": {"grid": list(self.grid_size), "cells": cells},
+        }
+
+        self.total_heatmap += self.heatmap
+        self.heatmap.fill(0)
+        self._zones = {}
+        self._window_start = now
+        return result
+
+    def save_heatmap(self, path):
+        """Save the cumulative heatmap to a .npy file"""
+        np.save(path, self.total_heatmap)
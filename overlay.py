@@ -0,0 +1,100 @@
+"""
+Cached overlay layer for the display frame
+
+Static elements (zone points and outline, hint labels) are rendered once into
+a layer with a mask and only re-rendered when they change; each frame they are
+composited with one masked copy limited to the layer's bounding box. Dynamic
+HUD text is rendered into small cached patches, re-rendered only when the
+string changes.
+"""
+import cv2
+import numpy as np
+
+
+class _Patch:
+    """Pre-rendered image + mask placed at a fixed position"""
+    def __init__(self, image, mask, x, y):
+        self.image = image
+        self.mask = mask
+        self.x = x
+        self.y = y
+
+    def blit(self, frame):
+        height, width = frame.shape[:2]
+        x0, y0 = max(self.x, 0), max(self.y, 0)
+        x1 = min(self.x + self.image.shape[1], width)
+        y1 = min(self.y + self.image.shape[0], height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        px, py = x0 - self.x, y0 - self.y
+        np.copyto(frame[y0:y1, x0:x1], self.image[py:py + y1 - y0, px:px + x1 - x0],
+                  where=self.mask[py:py + y1 - y0, px:px + x1 - x0])
+
+
+def _render_text(text, org, font_scale, color, thickness, font=cv2.FONT_HERSHEY_SIMPLEX):
+    (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+    pad = thickness + 1
+    image = np.zeros((text_height + baseline + 2 * pad, text_width + 2 * pad, 3), dtype=np.uint8)
+    mask = np.zeros(image.shape[:2], dtype=np.uint8)
+    origin = (pad, pad + text_height)
+    cv2.putText(image, text, origin, font, font_scale, color, thickness)
+    cv2.putText(mask, text, origin, font, font_scale, 255, thickness)
+    # Vị trí patch sao cho chữ nằm đúng chỗ như khi gọi cv2.putText(frame, text, org, ...)
+    return _Patch(image, (mask > 0)[:, :, None], org[0] - pad, org[1] - pad - text_height)
+
+
+class OverlayCompositor:
+    """Static zone/label layer plus cached dynamic text patches"""
+    def __init__(self):
+        self._static_key = None
+        self._static = None
+        self._texts = {}
+
+    def _render_static(self, shape, points, labels):
+        layer = np.zeros(shape, dtype=np.uint8)
+        mask = np.zeros(shape[:2], dtype=np.uint8)
+        for target, circle_color, line_color in ((layer, (0, 0, 255), (255, 0, 0)), (mask, 255, 255)):
+            for point in points:
+                cv2.circle(target, (point[0], point[1]), 5, circle_color, -1)
+            if len(points) > 1:
+                cv2.polylines(target, [np.int32(points)], False, line_color, thickness=2)
+            for text, org, font_scale, color, thickness in labels:
+                cv2.putText(target, text, org, cv2.FONT_HERSHEY_SIMPLEX, font_scale,
+                            color if target is layer else 255, thickness)
+
+        # Chỉ giữ phần bao quanh các phần tử tĩnh để copy mỗi frame nhỏ nhất có thể
+        ys, xs = np.nonzero(mask)
+        if len(xs) == 0:
+            return None
+        x0, x1, y0, y1 = xs.min(), xs.max() + 1, ys.min(), ys.max() + 1
+        return _Patch(layer[y0:y1, x0:x1].copy(), (mask[y0:y1, x0:x1] > 0)[:, :, None], int(x0), int(y0))
+
+    def compose(self, frame, points, labels=()):
+        """
+        Composite the static layer onto the frame
+
+        Args:
+            frame (numpy.ndarray): Frame to draw on (modified in place)
+            points (list): Zone polygon points
+            labels (tuple): Static labels as (text, org, font_scale, color, thickness)
+
+        Returns:
+            numpy.ndarray: The frame
+        """
+        key = (frame.shape, tuple(map(tuple, points)), tuple(labels))
+        if key != self._static_key:
+            self._static_key = key
+            self._static = self._render_static(frame.shape, points, labels)
+        if self._static is not None:
+            self._static.blit(frame)
+        return frame
+
+    def text(self, frame, name, text, org, font_scale, color, thickness=1):
+        """Draw dynamic text, re-rendering its patch only when the content changes"""
+        key = (text, org, font_scale, color, thickness)
+        cached = self._texts.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, _render_text(text, org, font_scale, color, thickness))
+            self._texts[name] = cached
+        cached[1].blit(frame)
+        return frame
@@ -0,0 +1,135 @@
+"""
+Runtime reconfiguration commands received on the MQTT down topic
+
+Command format:
+    {"id": "cmd-42", "settings": {"detect_interval": 0.5, "conf_threshold": 0.6}}
+
+`zone` points are in processed-frame coordinates: the INFERENCE_FRAME_SIZE
+frame (640x360 by default) in dual-resolution mode, the camera capture size
+otherwise.
+
+Commands are validated in the MQTT callback thread and queued; the detection
+loop drains the queue between frames and applies them without reloading the
+model, then acknowledges them on the data topic.
+"""
+import threading
+
+
+def _number(kind, low, high):
+    def validate(value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError("expected a number")
+        if kind is int and int(value) != value:
+            raise ValueError("expected an integer")
+        value = kind(value)
+        if not low <= value <= high:
+            raise ValueError(f"must be between {low} and {high}")
+        return value
+    return validate
+
+
+def _input_size(value):
+    value = _number(int, 128, 1280)(value)
+    if value % 32 != 0:
+        raise ValueError("must be a multiple of 32")
+    return value
+
+
+def _zone(value):
+    if not isinstance(value, list) or len(value) < 3:
+        raise ValueError("expected a list of at least 3 [x, y] points")
+    points = []
+    for point in value:
+        if (not isinstance(point, (list, tuple)) or len(point) != 2
+                or not all(isinstance(c, int) and not isinstance(c, bool) and c >= 0 for c in point)):
+            raise ValueError("points must be [x, y] pairs of non-negative integers")
+        points.append([point[0], point[1]])
+    return points
+
+
+# Tên setting -> hàm kiểm tra (trả về giá trị đã chuẩn hoá hoặc raise ValueError)
+SETTINGS_SCHEMA = {
+    "detect_interval": _number(float, 0.0, 10.0),
+    "input_size": _input_size,
+    "conf_threshold": _number(float, 0.05, 0.95),
+    "nms_threshold": _number(float, 0.05, 0.95),
+    "brightness_factor": _number(float, 0.5, 3.0),
+    "brightness_mode": _number(int, 1, 3),
+    "zone": _zone,
+}
+
+
+def validate_settings(settings, dynamic_input_size=True):
+    """
+    Validate a settings dict against SETTINGS_SCHEMA
+
+    Args:
+        settings (dict): Settings from the command
+        dynamic_input_size (bool): Whether the detector backend can change input_size at runtime
+
+    Returns:
+        tuple: (valid settings dict, errors dict of name -> message)
+    """
+    valid = {}
+    errors = {}
+    for name, value in settings.items():
+        validator = SETTINGS_SCHEMA.get(name)
+        if validator is None:
+            errors[name] = "unknown setting"
+            continue
+        if name == "input_size" and not dynamic_input_size:
+            errors[name] = "not supported by the detector backend"
+            continue
+        try:
+            valid[name] = validator(value)
+        except ValueError as e:
+            errors[name] = str(e)
+    return valid, errors
+
+
+def make_ack(command_id, status, applied=None, errors=None):
+    """Build the acknowledgement payload published on the data topic"""
+    ack = {"id": command_id, "status": status, "applied": sorted(applied or [])}
+    if errors:
+        ack["errors"] = errors
+    return ack
+
+
+class RuntimeConfig:
+    """Thread-safe queue of validated setting changes"""
+    def __init__(self, dynamic_input_size=True):
+        """
+        Args:
+            dynamic_input_size (bool): Accept input_size changes (set from the detector backend)
+        """
+        self.dynamic_input_size = dynamic_input_size
+        self._lock = threading.Lock()
+        self._pending = []
+
+    def submit(self, payload):
+        """
+        Validate a command from the down topic and queue it
+
+        A command is applied all-or-nothing: any invalid setting rejects it.
+
+        Returns:
+            dict: Rejection ack to publish right away, or None if queued
+        """
+        if not isinstance(payload, dict) or not isinstance(payload.get("settings"), dict):
+            command_id = payload.get("id") if isinstance(payload, dict) else None
+            return make_ack(command_id, "rejected", errors={"settings": "expected an object"})
+
+        command_id = payload.get("id")
+        valid, errors = validate_settings(payload["settings"], self.dynamic_input_size)
+        if errors or not valid:
+            return make_ack(command_id, "rejected", errors=errors or {"settings": "empty"})
+
+        with self._lock:
+            self._pending.append((command_id, valid))
+        return None
+
+    def drain(self):
+        """Return and clear the queued (command_id, settings) pairs"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return pending
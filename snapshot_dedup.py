@@ -0,0 +1,91 @@
+"""
+Near-duplicate suppression for alert snapshots
+
+A 64-bit difference hash (dHash) of a tiny grayscale thumbnail is compared
+against a small LRU of recent hashes per zone; snapshots within the Hamming
+distance threshold are reported as duplicates so uploads can be skipped.
+"""
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+
+def dhash(image, hash_size=8):
+    """
+    Difference hash of an image
+
+    Args:
+        image (numpy.ndarray): BGR or grayscale image
+        hash_size (int): Hash is hash_size * hash_size bits
+
+    Returns:
+        int: The hash as an integer
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class SnapshotDeduplicator:
+    """Per-zone LRU of recent snapshot hashes with suppression counters"""
+    def __init__(self, threshold=6, history=8):
+        """
+        Args:
+            threshold (int): Maximum Hamming distance (of 64 bits) treated as a duplicate
+            history (int): Number of recent hashes remembered per zone
+        """
+        self.threshold = threshold
+        self.history = history
+        self._recent = {}
+        self.sent = {}
+        self.suppressed = {}
+
+    def check(self, zone_id, image, force=False):
+        """
+        Decide whether a snapshot is a near-duplicate of a recent one
+
+        Args:
+            zone_id (str): Zone the snapshot belongs to
+            image (numpy.ndarray): Snapshot image
+            force (bool): Always accept (e.g. first snapshot of an event) but remember its hash
+
+        Returns:
+            tuple: (is_duplicate, closest Hamming distance or None)
+        """
+        value = dhash(image)
+        recent = self._recent.setdefault(zone_id, OrderedDict())
+
+        closest, distance = None, None
+        for known in recent:
+            d = hamming_distance(value, known)
+            if distance is None or d < distance:
+                closest, distance = known, d
+
+        if not force and distance is not None and distance <= self.threshold:
+            # Đánh dấu hash vừa khớp là mới dùng gần đây
+            recent.move_to_end(closest)
+            self.suppressed[zone_id] = self.suppressed.get(zone_id, 0) + 1
+            return True, distance
+
+        recent[value] = True
+        recent.move_to_end(value)
+        while len(recent) > self.history:
+            recent.popitem(last=False)
+        self.sent[zone_id] = self.sent.get(zone_id, 0) + 1
+        return False, distance
+
+    def stats(self):
+        """Suppression counters, e.g. {"sent": 3, "suppressed": 12, "zones": {...}}"""
+        zones = {zone_id: {"sent": self.sent.get(zone_id, 0), "suppressed": self.suppressed.get(zone_id, 0)}
+                 for zone_id in set(self.sent) | set(self.suppressed)}
+        return {
+            "sent": sum(self.sent.values()),
+            "suppressed": sum(self.suppressed.values()),
+            "zones": zones,
+        }
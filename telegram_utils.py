@@ -1,7 +1,7 @@
 
 import requests
 
-def send_telegram(photo_path="alert.png"):
+def send_telegram(photo_path="alert.png", caption="⚠️ Có xâm nhập, nguy hiểm!"):
     token   = "__your_token__"
     chat_id = "__Your_chat_id__"
     url     = f"https://api.telegram.org/bot{token}/sendPhoto"
@@ -10,9 +10,21 @@ def send_telegram(photo_path="alert.png"):
         with open(photo_path, "rb") as f:
             files = {"photo": f}
             data  = {"chat_id": chat_id,
-                     "caption": "⚠️ Có xâm nhập, nguy hiểm!"}
+                     "caption": caption}
             r = requests.post(url, files=files, data=data)
             r.raise_for_status()
         print("Send success:", r.json())
     except Exception as ex:
         print("Cannot send telegram:", ex)
+
+def send_telegram_message(text):
+    token   = "__your_token__"
+    chat_id = "__Your_chat_id__"
+    url     = f"https://api.telegram.org/bot{token}/sendMessage"
+
+    try:
+        r = requests.post(url, data={"chat_id": chat_id, "text": text})
+        r.raise_for_status()
+        print("Send success:", r.json())
+    except Exception as ex:
+        print("Cannot send telegram:", ex)
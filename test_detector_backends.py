@@ -0,0 +1,121 @@
+"""
+Test ONNX output decoding and input shape handling with synthetic arrays
+Run: python -m pytest test_detector_backends.py
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+import detector_backends
+from detector_backends import OnnxBackend
+
+INPUT_SIZE = (640, 640)
+FRAME_WIDTH, FRAME_HEIGHT = 1280, 720
+# Box (cx, cy, w, h) in input pixels -> [x, y, w, h] in frame pixels (x2, y1.125)
+BOX = (320.0, 320.0, 64.0, 128.0)
+EXPECTED_BOX = [576.0, 288.0, 128, 144]
+
+
+class FakeInput:
+    def __init__(self, shape):
+        self.name = "images"
+        self.shape = shape
+
+
+class FakeSessionOptions:
+    intra_op_num_threads = 0
+
+
+class FakeSession:
+    def __init__(self, input_shape, options):
+        self.input_shape = input_shape
+        self.options = options
+
+    def get_inputs(self):
+        return [FakeInput(self.input_shape)]
+
+
+class FakeOrt:
+    """Minimal stand-in for the onnxruntime module"""
+    SessionOptions = FakeSessionOptions
+
+    def __init__(self, input_shape):
+        self.input_shape = input_shape
+
+    def InferenceSession(self, model_file, sess_options=None, providers=None):
+        return FakeSession(self.input_shape, sess_options)
+
+
+def make_backend(monkeypatch, output_format="auto", input_shape=(1, 3, 640, 640)):
+    monkeypatch.setattr(detector_backends, "ort", FakeOrt(input_shape))
+    return OnnxBackend("model.onnx", runtime="onnxruntime", output_format=output_format, input_size=INPUT_SIZE)
+
+
+def yolov5_output(rows=20):
+    # (1, N, 5 + classes): cx, cy, w, h, objectness, class scores
+    out = np.zeros((1, rows, 8), dtype=np.float32)
+    out[0, 3] = BOX + (0.9, 0.1, 0.8, 0.2)
+    out[0, 7] = BOX + (0.2, 0.1, 0.9, 0.1)  # Low objectness: 0.18 after weighting
+    return [out]
+
+
+def yolov8_output(rows=100):
+    # (1, 4 + classes, N): box and class channels first
+    out = np.zeros((1, 7, rows), dtype=np.float32)
+    out[0, :, 42] = BOX + (0.05, 0.9, 0.1)
+    out[0, :, 50] = BOX + (0.3, 0.1, 0.1)
+    return [out]
+
+
+@pytest.mark.parametrize("output_format", ["auto", "yolov5"])
+def test_decodes_yolov5_output(monkeypatch, output_format):
+    backend = make_backend(monkeypatch, output_format)
+    boxes, confidences, class_ids = backend._decode(yolov5_output(), FRAME_WIDTH, FRAME_HEIGHT, 0.5, None)
+    assert boxes == [EXPECTED_BOX]
+    assert confidences == [pytest.approx(0.72)]
+    assert class_ids == [1]
+
+
+@pytest.mark.parametrize("output_format", ["auto", "yolov8"])
+def test_decodes_yolov8_output(monkeypatch, output_format):
+    backend = make_backend(monkeypatch, output_format)
+    boxes, confidences, class_ids = backend._decode(yolov8_output(), FRAME_WIDTH, FRAME_HEIGHT, 0.25, None)
+    assert boxes == [EXPECTED_BOX, EXPECTED_BOX]
+    assert confidences == [pytest.approx(0.9), pytest.approx(0.3)]
+    assert class_ids == [1, 0]
+
+
+def test_decode_keeps_only_requested_classes(monkeypatch):
+    backend = make_backend(monkeypatch)
+    boxes, _, class_ids = backend._decode(yolov8_output(), FRAME_WIDTH, FRAME_HEIGHT, 0.25, {0})
+    assert boxes == [EXPECTED_BOX]
+    assert class_ids == [0]
+    assert backend._decode(yolov5_output(), FRAME_WIDTH, FRAME_HEIGHT, 0.5, {0}) == ([], [], [])
+
+
+def test_fixed_input_shape_overrides_configured_size(monkeypatch):
+    monkeypatch.setattr(detector_backends, "ort", FakeOrt((1, 3, 480, 640)))
+    backend = OnnxBackend("model.onnx", runtime="onnxruntime", input_size=(416, 416))
+    assert not backend.supports_dynamic_input
+    assert backend.input_size == (640, 480)
+    assert backend.make_blob(np.zeros((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)).shape == (1, 3, 480, 640)
+
+
+def test_dynamic_input_shape_keeps_configured_size(monkeypatch):
+    monkeypatch.setattr(detector_backends, "ort", FakeOrt((1, 3, "height", "width")))
+    backend = OnnxBackend("model.onnx", runtime="onnxruntime", input_size=(416, 416))
+    assert backend.supports_dynamic_input
+    assert backend.input_size == (416, 416)
+
+
+def test_set_num_threads_rebuilds_onnxruntime_session(monkeypatch):
+    backend = make_backend(monkeypatch)
+    session = backend.session
+    backend.set_num_threads(2)
+    assert backend.session is not session
+    assert backend.session.options.intra_op_num_threads == 2
+
+    session = backend.session
+    backend.set_num_threads(2)
+    assert backend.session is session  # Unchanged count keeps the session
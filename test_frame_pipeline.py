@@ -0,0 +1,94 @@
+"""
+Test that the per-frame path (flip, brightness, overlays, blob) reuses its buffers
+Run: python -m pytest test_frame_pipeline.py
+"""
+import tracemalloc
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from detector_backends import DetectorBackend
+from frame_pipeline import FramePipeline
+from overlay import OverlayCompositor
+
+FRAME_SHAPE = (720, 1280, 3)
+POINTS = [[100, 100], [600, 120], [650, 500], [120, 480], [100, 100]]
+
+
+def run_frames(pipeline, backend, overlay, frame, count):
+    for i in range(count):
+        mode = (i % 3) + 1
+        out = pipeline.process(frame, brightness_mode=mode, brightness_factor=1.4)
+        backend.make_blob(out)
+        overlay.compose(out, POINTS)
+        overlay.text(out, "people", "People in area: 1", (10, 80), 0.7, (0, 255, 0), 2)
+        overlay.text(out, "mqtt", "MQTT: Connected", (10, out.shape[0] - 10), 0.45, (0, 255, 0))
+
+
+def test_make_blob_matches_opencv():
+    frame = np.random.randint(0, 255, FRAME_SHAPE, dtype=np.uint8)
+    backend = DetectorBackend(input_size=(416, 416))
+    expected = cv2.dnn.blobFromImage(frame, 1 / 255, (416, 416), (0, 0, 0), True, crop=False)
+    assert np.allclose(backend.make_blob(frame), expected, atol=1e-6)
+
+
+def test_hsv_mode_matches_reference():
+    frame = np.random.randint(0, 255, FRAME_SHAPE, dtype=np.uint8)
+    hsv = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2HSV)
+    h, s, v = cv2.split(hsv)
+    v = cv2.convertScaleAbs(v, alpha=1.5, beta=0)
+    expected = cv2.cvtColor(cv2.merge([h, s, v]), cv2.COLOR_HSV2BGR)
+
+    out = FramePipeline().process(frame, brightness_mode=3, brightness_factor=1.5)
+    assert np.array_equal(out, expected)
+
+
+def test_steady_state_allocations_are_flat():
+    frame = np.random.randint(0, 255, FRAME_SHAPE, dtype=np.uint8)
+    pipeline = FramePipeline()
+    backend = DetectorBackend(input_size=(416, 416))
+    overlay = OverlayCompositor()
+
+    # Warm up: allocate every buffer once
+    run_frames(pipeline, backend, overlay, frame, 6)
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run_frames(pipeline, backend, overlay, frame, 30)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # A single new frame-sized array per iteration would show up in the peak
+    assert current - baseline < 64 * 1024
+    assert peak - baseline < frame.nbytes // 8
+
+
+def test_dual_resolution_processes_small_frame_and_keeps_full_capture():
+    pipeline = FramePipeline(inference_size=(640, 360), full_res_frames=2)
+    backend = DetectorBackend(input_size=(416, 416))
+    captures = [np.full(FRAME_SHAPE, i, dtype=np.uint8) for i in range(3)]
+    for capture in captures:
+        out = pipeline.process(capture, brightness_mode=1, brightness_factor=1.0)
+    assert out.shape == (360, 640, 3)
+
+    evidence, scale_x, scale_y = pipeline.evidence_frame()
+    assert evidence.shape == FRAME_SHAPE
+    assert (scale_x, scale_y) == (2.0, 2.0)
+    assert evidence[0, 0, 0] == 2  # Latest capture
+
+    frame = np.random.randint(0, 255, FRAME_SHAPE, dtype=np.uint8)
+    overlay = OverlayCompositor()
+    run_frames(pipeline, backend, overlay, frame, 6)
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run_frames(pipeline, backend, overlay, frame, 30)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak - baseline < frame.nbytes // 8
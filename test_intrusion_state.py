@@ -0,0 +1,54 @@
+"""
+Test the intrusion event state machine (enter dwell, exit grace, minimum hold)
+Run: python -m pytest test_intrusion_state.py
+"""
+from intrusion_state import ZoneIntrusionTracker, IntrusionStateMachine, EVENT_START, EVENT_END, STATE_ACTIVE
+
+
+def feed(tracker, samples):
+    """samples: list of (time, people_count); returns emitted events"""
+    events = []
+    for now, count in samples:
+        event = tracker.update(count, now)
+        if event is not None:
+            events.append(event)
+    return events
+
+
+def test_short_blip_does_not_start_intrusion():
+    tracker = ZoneIntrusionTracker("zone0", enter_dwell=1.0, exit_grace=2.0, min_hold=0)
+    events = feed(tracker, [(0.0, 1), (0.5, 1), (0.6, 0), (1.5, 0)])
+    assert events == []
+    assert not tracker.active
+
+
+def test_missed_detection_inside_grace_keeps_event_open():
+    tracker = ZoneIntrusionTracker("zone0", enter_dwell=1.0, exit_grace=2.0, min_hold=0)
+    events = feed(tracker, [(0.0, 1), (1.0, 1), (1.5, 0), (2.0, 1), (2.5, 0), (4.0, 0), (4.5, 0)])
+    assert [e.kind for e in events] == [EVENT_START, EVENT_END]
+    assert events[0].event_id == events[1].event_id
+    assert events[1].timestamp == 4.5
+
+
+def test_min_hold_delays_end():
+    tracker = ZoneIntrusionTracker("zone0", enter_dwell=0, exit_grace=0.5, min_hold=5.0)
+    events = feed(tracker, [(0.0, 1), (1.0, 0), (2.0, 0), (4.9, 0), (5.0, 0)])
+    assert [(e.kind, e.timestamp) for e in events] == [(EVENT_START, 0.0), (EVENT_END, 5.0)]
+
+
+def test_each_intrusion_gets_a_new_id_per_zone():
+    machine = IntrusionStateMachine(enter_dwell=0, exit_grace=0, min_hold=0)
+    first = machine.update({"zone0": 1, "zone1": 0}, 0.0)
+    machine.update({"zone0": 0, "zone1": 0}, 1.0)
+    second = machine.update({"zone0": 1, "zone1": 1}, 2.0)
+    assert len(first) == 1 and len(second) == 2
+    ids = {first[0].event_id} | {e.event_id for e in second}
+    assert len(ids) == 3
+    assert {e.zone_id for e in second} == {"zone0", "zone1"}
+
+
+def test_clearing_state_is_not_occupied():
+    tracker = ZoneIntrusionTracker("zone0", enter_dwell=0, exit_grace=2.0, min_hold=0)
+    feed(tracker, [(0.0, 1), (1.0, 0)])
+    assert tracker.active
+    assert tracker.state != STATE_ACTIVE
@@ -0,0 +1,163 @@
+"""
+Test the encode-once MJPEG broadcaster (rate cap, shared bytes, frame skipping, snapshots)
+Run: python -m pytest test_mjpeg_stream.py
+"""
+import threading
+import time
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("flask")
+
+from mjpeg_stream import FrameBroadcaster, create_stream_app
+
+FRAME_SHAPE = (120, 160, 3)
+
+
+@pytest.fixture
+def make_broadcaster():
+    broadcasters = []
+
+    def make(**kwargs):
+        broadcaster = FrameBroadcaster(**kwargs)
+        broadcasters.append(broadcaster)
+        return broadcaster
+
+    yield make
+    for broadcaster in broadcasters:
+        broadcaster.stop()
+
+
+def solid(value):
+    return np.full(FRAME_SHAPE, value, dtype=np.uint8)
+
+
+def jpeg_of(chunk):
+    return chunk[chunk.index(b"\r\n\r\n") + 4:-2]
+
+
+def brightness(jpeg):
+    return int(cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_GRAYSCALE).mean())
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def start_client(broadcaster, count, max_fps=None):
+    """Read `count` chunks from a stream on a thread; returns (thread, chunks)"""
+    chunks = []
+
+    def read():
+        for chunk in broadcaster.stream(max_fps):
+            chunks.append(chunk)
+            if len(chunks) == count:
+                break
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    return thread, chunks
+
+
+def test_nothing_is_encoded_without_demand(make_broadcaster):
+    broadcaster = make_broadcaster(max_fps=100)
+    assert broadcaster.submit(solid(50)) is False
+    time.sleep(0.05)
+    assert broadcaster.encoded_frames == 0
+    assert broadcaster.latest() is None
+
+
+def test_submit_never_blocks(make_broadcaster):
+    broadcaster = make_broadcaster(max_fps=100)
+    broadcaster.clients = 1
+    with broadcaster._lock:  # Encoder busy swapping buffers
+        start = time.monotonic()
+        assert broadcaster.submit(solid(50)) is False
+        assert time.monotonic() - start < 0.05
+
+
+def test_encodes_at_most_once_per_interval(make_broadcaster):
+    broadcaster = make_broadcaster(max_fps=20)
+    start_client(broadcaster, count=1000)
+    wait_until(lambda: broadcaster.clients == 1)
+
+    accepted = 0
+    start = time.monotonic()
+    while time.monotonic() - start < 0.5:
+        accepted += broadcaster.submit(solid(50))
+    wait_until(lambda: broadcaster.encoded_frames == accepted)
+    assert 1 <= accepted <= 0.5 * 20 + 1
+
+
+def test_every_client_gets_the_same_bytes(make_broadcaster):
+    broadcaster = make_broadcaster(max_fps=5)
+    clients = [start_client(broadcaster, count=1) for _ in range(3)]
+    wait_until(lambda: broadcaster.clients == 3)
+
+    assert broadcaster.submit(solid(80))
+    for thread, _ in clients:
+        thread.join(timeout=2.0)
+    chunks = [chunks[0] for _, chunks in clients]
+    assert chunks[0] == chunks[1] == chunks[2]
+    assert jpeg_of(chunks[0]) == broadcaster.latest()
+    assert broadcaster.encoded_frames == 1
+
+
+def test_slow_client_skips_to_the_newest_frame(make_broadcaster):
+    broadcaster = make_broadcaster(max_fps=100)
+    stream = broadcaster.stream()
+    chunks = []
+    reader = threading.Thread(target=lambda: chunks.append(next(stream)), daemon=True)
+    reader.start()
+    wait_until(lambda: broadcaster.clients == 1)
+
+    broadcaster.submit(solid(0))
+    reader.join(timeout=2.0)
+    assert brightness(jpeg_of(chunks[0])) < 5
+
+    # The client does not read while four more frames are encoded
+    for i, value in enumerate((60, 120, 180, 240), start=2):
+        wait_until(lambda: broadcaster.submit(solid(value)))
+        wait_until(lambda: broadcaster.encoded_frames == i)
+    assert abs(brightness(jpeg_of(next(stream))) - 240) < 5
+    stream.close()
+    assert broadcaster.clients == 0
+
+
+def test_rate_capped_client_skips_frames(make_broadcaster):
+    broadcaster = make_broadcaster(max_fps=100)
+    thread, chunks = start_client(broadcaster, count=1000, max_fps=4)
+    wait_until(lambda: broadcaster.clients == 1)
+
+    start = time.monotonic()
+    while time.monotonic() - start < 1.0:
+        broadcaster.submit(solid(50))
+        time.sleep(0.005)
+    assert broadcaster.encoded_frames > 20
+    assert 1 <= len(chunks) <= 5
+
+
+def test_snapshot_endpoint_counts_as_demand(make_broadcaster):
+    broadcaster = make_broadcaster(max_fps=100)
+    client = create_stream_app(broadcaster).test_client()
+    running = True
+
+    def detection_loop():
+        while running:
+            broadcaster.submit(solid(50))
+            time.sleep(0.005)
+
+    loop = threading.Thread(target=detection_loop, daemon=True)
+    loop.start()
+    try:
+        response = client.get("/snapshot.jpg")
+    finally:
+        running = False
+        loop.join()
+    assert response.status_code == 200
+    assert response.mimetype == "image/jpeg"
+    assert response.data.startswith(b"\xff\xd8")
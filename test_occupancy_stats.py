@@ -0,0 +1,73 @@
+"""
+Test the windowed occupancy statistics (min/max/mean, dwell, heatmap, window rollover)
+Run: python -m pytest test_occupancy_stats.py
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from occupancy_stats import OccupancyAccumulator
+
+
+def test_min_max_time_weighted_mean_and_dwell():
+    acc = OccupancyAccumulator(window_seconds=60, max_sample_gap=5.0)
+    # Each sample's count holds for the time since the previous sample, gaps capped at 5 s
+    for now, count in [(0.0, 0), (2.0, 2), (3.0, 1), (13.0, 3), (20.0, 0)]:
+        acc.add(now, {"zone0": count})
+
+    zone = acc.summary(20.0)["zones"]["zone0"]
+    assert zone["min"] == 0
+    assert zone["max"] == 3
+    # (2 * 2 s + 1 * 1 s + 3 * 5 s + 0 * 5 s) / 13 s
+    assert zone["mean"] == round(20 / 13, 2)
+    # Occupied for 2 + 1 + 5 s; the 10 s gap only counts max_sample_gap
+    assert zone["dwell"] == 8.0
+
+
+def test_single_sample_uses_its_count_as_mean():
+    acc = OccupancyAccumulator()
+    acc.add(0.0, {"zone0": 2})
+    assert acc.summary(1.0)["zones"]["zone0"] == {"min": 2, "max": 2, "mean": 2.0, "dwell": 0.0}
+
+
+def test_heatmap_binning_and_clamping():
+    acc = OccupancyAccumulator(grid_size=(4, 2))
+    centroids = [(0, 0), (399, 199), (450, -10), (150, 150), (160, 120)]
+    acc.add(0.0, {"zone0": 1}, centroids, frame_size=(400, 200))
+
+    assert acc.heatmap.tolist() == [[1, 0, 0, 1], [0, 2, 0, 1]]
+    heat = acc.summary(1.0)["heat"]
+    assert heat["grid"] == [4, 2]
+    assert heat["cells"][0] == [5, 2]  # Row 1, column 1
+    assert sorted(heat["cells"][1:]) == [[0, 1], [3, 1], [7, 1]]
+
+
+def test_top_cells_limits_the_summary():
+    acc = OccupancyAccumulator(grid_size=(4, 2), top_cells=2)
+    acc.add(0.0, {}, [(10, 10), (10, 10), (10, 10), (350, 150), (350, 150), (150, 10)], frame_size=(400, 200))
+    assert acc.summary(1.0)["heat"]["cells"] == [[0, 3], [7, 2]]
+
+
+def test_window_rollover(tmp_path):
+    acc = OccupancyAccumulator(window_seconds=60, grid_size=(4, 2))
+    assert not acc.ready(0.0)
+    acc.add(100.0, {"zone0": 1}, [(10, 10)], frame_size=(400, 200))
+    acc.add(130.0, {"zone0": 2}, [(10, 10)], frame_size=(400, 200))
+    assert not acc.ready(159.0)
+    assert acc.ready(160.0)
+
+    first = acc.summary(160.0)
+    assert (first["start"], first["duration"]) == (100, 60.0)
+    assert first["heat"]["cells"] == [[0, 2]]
+
+    # The next window starts empty but the cumulative heatmap keeps the counts
+    assert not acc.ready(161.0)
+    second = acc.summary(170.0)
+    assert (second["start"], second["duration"]) == (160, 10.0)
+    assert second["zones"] == {}
+    assert second["heat"]["cells"] == []
+    assert acc.total_heatmap[0, 0] == 2
+
+    path = tmp_path / "heatmap.npy"
+    acc.save_heatmap(str(path))
+    assert np.array_equal(np.load(path), acc.total_heatmap)
@@ -0,0 +1,80 @@
+"""
+Test validation and queueing of runtime reconfiguration commands
+Run: python -m pytest test_runtime_config.py
+"""
+import pytest
+
+from runtime_config import RuntimeConfig, validate_settings, make_ack
+
+
+def test_valid_settings_are_normalized():
+    valid, errors = validate_settings({"detect_interval": 1, "brightness_mode": 2.0, "input_size": 320,
+                                       "zone": [[0, 0], [10, 0], (10, 10)]})
+    assert errors == {}
+    assert valid == {"detect_interval": 1.0, "brightness_mode": 2, "input_size": 320,
+                     "zone": [[0, 0], [10, 0], [10, 10]]}
+    assert isinstance(valid["detect_interval"], float)
+
+
+def test_unknown_setting_is_reported():
+    valid, errors = validate_settings({"frame_rate": 10, "conf_threshold": 0.5})
+    assert valid == {"conf_threshold": 0.5}
+    assert errors == {"frame_rate": "unknown setting"}
+
+
+@pytest.mark.parametrize("settings, message", [
+    ({"conf_threshold": True}, "expected a number"),
+    ({"detect_interval": "0.5"}, "expected a number"),
+    ({"conf_threshold": 0.99}, "must be between 0.05 and 0.95"),
+    ({"brightness_mode": 1.5}, "expected an integer"),
+    ({"input_size": 400}, "must be a multiple of 32"),
+    ({"input_size": 64}, "must be between 128 and 1280"),
+])
+def test_invalid_values_are_rejected(settings, message):
+    valid, errors = validate_settings(settings)
+    assert valid == {}
+    assert list(errors.values()) == [message]
+
+
+def test_input_size_rejected_when_backend_input_is_fixed():
+    valid, errors = validate_settings({"input_size": 320}, dynamic_input_size=False)
+    assert valid == {}
+    assert errors == {"input_size": "not supported by the detector backend"}
+
+
+@pytest.mark.parametrize("zone", [
+    [[0, 0], [10, 0]],                  # Fewer than 3 points
+    {"points": [[0, 0], [1, 1], [2, 2]]},
+    [[0, 0], [10, 0], [10]],            # Not a pair
+    [[0, 0], [10, 0], [10, -1]],        # Negative coordinate
+    [[0, 0], [10, 0], [10.5, 10]],      # Not an integer
+    [[0, 0], [10, 0], [True, 10]],
+])
+def test_zone_shape_is_checked(zone):
+    valid, errors = validate_settings({"zone": zone})
+    assert valid == {}
+    assert "zone" in errors
+
+
+def test_submit_queues_valid_commands_until_drained():
+    config = RuntimeConfig()
+    assert config.submit({"id": "cmd-1", "settings": {"conf_threshold": 0.6}}) is None
+    assert config.submit({"id": "cmd-2", "settings": {"detect_interval": 0.5}}) is None
+    assert config.drain() == [("cmd-1", {"conf_threshold": 0.6}), ("cmd-2", {"detect_interval": 0.5})]
+    assert config.drain() == []
+
+
+def test_submit_rejects_whole_command_on_any_error():
+    config = RuntimeConfig()
+    ack = config.submit({"id": "cmd-3", "settings": {"conf_threshold": 0.6, "input_size": 400}})
+    assert ack == make_ack("cmd-3", "rejected", errors={"input_size": "must be a multiple of 32"})
+    assert ack["applied"] == []
+    assert config.drain() == []  # conf_threshold was not applied either
+
+
+def test_submit_rejects_malformed_commands():
+    config = RuntimeConfig(dynamic_input_size=False)
+    assert config.submit({"id": "cmd-4", "settings": {}})["errors"] == {"settings": "empty"}
+    assert config.submit({"id": "cmd-5", "settings": [1, 2]})["errors"] == {"settings": "expected an object"}
+    assert config.submit({"id": "cmd-6", "settings": {"input_size": 320}})["status"] == "rejected"
+    assert config.drain() == []
@@ -0,0 +1,86 @@
+"""
+Test the dHash near-duplicate filter for alert snapshots
+Run: python -m pytest test_snapshot_dedup.py
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from snapshot_dedup import dhash, hamming_distance, SnapshotDeduplicator
+
+rng = np.random.default_rng(0)
+
+
+def scene():
+    return rng.integers(0, 255, (80, 90, 3), dtype=np.uint8)
+
+
+def test_hamming_distance():
+    assert hamming_distance(0b1011, 0b0001) == 2
+    assert hamming_distance(2 ** 64 - 1, 0) == 64
+
+
+def test_dhash_is_stable_and_tolerates_small_changes():
+    image = scene()
+    assert dhash(image) == dhash(image.copy())
+    assert dhash(image) == dhash(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+    assert 0 <= dhash(image) < 2 ** 64
+
+    # Thêm chút nhiễu / đổi độ sáng nhẹ vẫn là cùng cảnh
+    noisy = cv2.add(image, np.full(image.shape, 3, dtype=np.uint8))
+    assert hamming_distance(dhash(image), dhash(noisy)) <= 6
+    assert hamming_distance(dhash(image), dhash(scene())) > 6
+
+
+def test_threshold_decides_duplicates():
+    first, second = scene(), scene()
+    distance = hamming_distance(dhash(first), dhash(second))
+
+    dedup = SnapshotDeduplicator(threshold=distance, history=8)
+    assert dedup.check("zone0", first) == (False, None)
+    assert dedup.check("zone0", second) == (True, distance)
+
+    dedup = SnapshotDeduplicator(threshold=distance - 1, history=8)
+    dedup.check("zone0", first)
+    assert dedup.check("zone0", second) == (False, distance)
+
+
+def test_force_accepts_and_remembers():
+    image = scene()
+    dedup = SnapshotDeduplicator(threshold=6, history=8)
+    dedup.check("zone0", image)
+    assert dedup.check("zone0", image, force=True) == (False, 0)
+    assert dedup.check("zone0", image) == (True, 0)
+    assert dedup.stats() == {"sent": 2, "suppressed": 1, "zones": {"zone0": {"sent": 2, "suppressed": 1}}}
+
+
+def test_lru_evicts_least_recently_matched():
+    a, b, c = scene(), scene(), scene()
+    dedup = SnapshotDeduplicator(threshold=6, history=2)
+    dedup.check("zone0", a)
+    dedup.check("zone0", b)
+    assert dedup.check("zone0", a)[0]  # a becomes the most recently used
+    dedup.check("zone0", c)  # Evicts b
+    assert dedup.check("zone0", a)[0]
+    assert not dedup.check("zone0", b)[0]
+
+
+def test_zones_are_independent_and_counted_separately():
+    image = scene()
+    dedup = SnapshotDeduplicator(threshold=6, history=8)
+    dedup.check("zone0", image)
+    dedup.check("zone0", image)
+    assert dedup.check("zone1", image) == (False, None)
+    assert dedup.stats() == {
+        "sent": 2,
+        "suppressed": 1,
+        "zones": {"zone0": {"sent": 1, "suppressed": 1}, "zone1": {"sent": 1, "suppressed": 0}},
+    }
+
+
+def test_negative_threshold_disables_suppression():
+    image = scene()
+    dedup = SnapshotDeduplicator(threshold=-1, history=8)
+    dedup.check("zone0", image)
+    assert dedup.check("zone0", image) == (False, 0)
@@ -0,0 +1,123 @@
+"""
+Test the thermal governor against fake /sys/class/thermal and /proc/loadavg files
+Run: python -m pytest test_thermal_governor.py
+"""
+from thermal_governor import ThermalGovernor
+
+LEVELS = (
+    {"detect_interval": 0.0, "input_size": 416, "num_threads": 4},
+    {"detect_interval": 0.5, "input_size": 320, "num_threads": 2},
+    {"detect_interval": 1.0, "input_size": 256, "num_threads": 1},
+)
+
+
+def make_governor(tmp_path, temp_c=50.0, load=0.5, levels=LEVELS):
+    temp_file = tmp_path / "temp"
+    load_file = tmp_path / "loadavg"
+    governor = ThermalGovernor(temp_path=str(temp_file), loadavg_path=str(load_file), levels=levels,
+                               temp_high=75.0, temp_low=65.0, load_high=0.9, load_low=0.6,
+                               poll_interval=5.0, step_up_after=20.0, step_down_after=30.0, cpu_count=4)
+    set_sensors(tmp_path, temp_c, load)
+    return governor
+
+
+def set_sensors(tmp_path, temp_c, load):
+    (tmp_path / "temp").write_text(f"{int(temp_c * 1000)}\n")
+    (tmp_path / "loadavg").write_text(f"{load * 4:.2f} 1.00 1.00 2/300 1234\n")
+
+
+def test_reads_fake_sensor_files(tmp_path):
+    governor = make_governor(tmp_path, temp_c=62.3, load=0.25)
+    assert governor.read_temperature() == 62.3
+    assert governor.read_load() == 0.25
+
+
+def test_steps_up_when_hot_and_respects_poll_interval(tmp_path):
+    governor = make_governor(tmp_path, temp_c=80.0)
+    assert governor.poll(0.0) == LEVELS[1]
+    assert governor.poll(1.0) is None
+    assert governor.poll(20.0) == LEVELS[2]
+    assert governor.poll(40.0) is None  # Already at the lightest level
+
+
+def test_holds_each_level_before_stepping_up_again(tmp_path):
+    governor = make_governor(tmp_path, temp_c=80.0)
+    assert governor.poll(0.0) == LEVELS[1]
+    for now in (5.0, 10.0, 15.0):
+        assert governor.poll(now) is None
+    assert governor.level == 1
+    assert governor.poll(20.0) == LEVELS[2]
+
+
+def test_hysteresis_band_holds_level(tmp_path):
+    governor = make_governor(tmp_path, temp_c=80.0)
+    governor.poll(0.0)
+    set_sensors(tmp_path, 70.0, 0.5)  # Between temp_low and temp_high
+    for now in range(5, 120, 5):
+        assert governor.poll(float(now)) is None
+    assert governor.level == 1
+
+
+def test_steps_down_only_after_calm_period(tmp_path):
+    governor = make_governor(tmp_path, temp_c=80.0)
+    governor.poll(0.0)
+    set_sensors(tmp_path, 60.0, 0.3)
+    assert governor.poll(5.0) is None
+    assert governor.poll(30.0) is None
+    assert governor.poll(35.0) == LEVELS[0]
+
+
+def test_latency_and_load_trigger_step_up(tmp_path):
+    governor = make_governor(tmp_path, temp_c=50.0, load=0.95)
+    assert governor.poll(0.0) == LEVELS[1]
+
+    governor = make_governor(tmp_path, temp_c=50.0, load=0.3)
+    governor.report_latency(2.0)
+    assert governor.poll(0.0) == LEVELS[1]
+
+
+def test_latency_only_moves_to_smaller_input(tmp_path):
+    levels = (
+        {"detect_interval": 0.0, "input_size": 416, "num_threads": 4},
+        {"detect_interval": 0.2, "input_size": 416, "num_threads": 3},
+        {"detect_interval": 0.5, "input_size": 320, "num_threads": 2},
+    )
+    governor = make_governor(tmp_path, temp_c=50.0, load=0.3, levels=levels)
+    governor.report_latency(2.0)
+    assert governor.poll(0.0) == levels[2]  # Level 1 only changes the interval
+
+    governor = make_governor(tmp_path, temp_c=50.0, load=0.3,
+                             levels=tuple(dict(level, input_size=416) for level in levels))
+    governor.report_latency(2.0)
+    assert governor.poll(0.0) is None  # No level makes a single run faster
+
+
+def test_level_zero_uses_base_and_lighter_levels_never_exceed_it(tmp_path):
+    governor = ThermalGovernor(temp_path=str(tmp_path / "none"), loadavg_path=str(tmp_path / "none"),
+                               levels=LEVELS, base={"detect_interval": 0.8, "input_size": 288})
+    assert [level["detect_interval"] for level in governor.levels] == [0.8, 0.8, 1.0]
+    assert [level["input_size"] for level in governor.levels] == [288, 288, 256]
+
+    # Giá trị đặt từ xa thay mức cơ sở, mức hiện tại vẫn giữ nguyên
+    governor.level = 1
+    assert governor.set_base(input_size=224) == {"detect_interval": 0.8, "input_size": 224, "num_threads": 2}
+
+
+def test_fixed_input_backend_keeps_input_size(tmp_path):
+    governor = ThermalGovernor(temp_path=str(tmp_path / "none"), loadavg_path=str(tmp_path / "none"),
+                               levels=LEVELS, base={"input_size": 640}, dynamic_input=False)
+    assert [level["input_size"] for level in governor.levels] == [640, 640, 640]
+
+    # Latency cannot be helped by any level and must not block stepping back down
+    governor.level = 1
+    governor.report_latency(2.0)
+    assert governor.poll(0.0) is None
+    assert governor.poll(30.0) == governor.levels[0]
+
+
+def test_missing_sensors_do_not_block(tmp_path):
+    governor = ThermalGovernor(temp_path=str(tmp_path / "none"), loadavg_path=str(tmp_path / "none"),
+                               levels=LEVELS, step_down_after=0)
+    assert governor.read_temperature() is None
+    assert governor.poll(0.0) is None
+    assert governor.level == 0
@@ -0,0 +1,87 @@
+"""
+Test the ring-buffer time-series store (wrap-around, tiers, read-only access)
+Run: python -m pytest test_timeseries_store.py
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+import timeseries_store
+from timeseries_store import TimeSeriesStore
+
+T0 = 3600 * 500000  # Aligned to an hour so every tier starts on a bucket boundary
+
+
+def test_ring_wraps_around_and_keeps_latest_samples(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), tiers=((1, 10), (60, 5)))
+    for i in range(25):
+        store.record("zone0_count", i, now=T0 + i)
+
+    resolution, points = store.query("zone0_count", T0, T0 + 24, resolution=1)
+    assert resolution == 1
+    assert [p[0] for p in points] == [T0 + i for i in range(15, 25)]
+    assert [p[1] for p in points] == [float(i) for i in range(15, 25)]
+
+    # Các ô bị ghi đè không còn trả về giá trị cũ
+    assert store.query("zone0_count", T0, T0 + 14, resolution=1)[1] == []
+
+
+def test_same_range_at_each_resolution(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), tiers=((1, 7200), (60, 120), (3600, 3)))
+    # Một mẫu mỗi 10 s trong 2 giờ; giờ thứ hai lệch thêm 10
+    for i in range(720):
+        store.record("zone0_count", i % 6 + (10 if i >= 360 else 0), now=T0 + i * 10)
+    start, end = T0, T0 + 7199
+
+    _, seconds = store.query("zone0_count", start, end, resolution=1)
+    assert len(seconds) == 720
+    assert seconds[0] == [T0, 0.0, 0.0, 0.0]
+    assert seconds[-1] == [T0 + 7190, 15.0, 15.0, 15.0]
+
+    _, minutes = store.query("zone0_count", start, end, resolution=60)
+    assert len(minutes) == 120
+    assert minutes[0] == [T0, 2.5, 0.0, 5.0]
+    assert minutes[-1] == [T0 + 7140, 12.5, 10.0, 15.0]
+
+    _, hours = store.query("zone0_count", start, end, resolution=3600)
+    assert hours == [[T0, 2.5, 0.0, 5.0], [T0 + 3600, 12.5, 10.0, 15.0]]
+
+
+def test_pick_resolution_for_recent_ranges(tmp_path, monkeypatch):
+    store = TimeSeriesStore(str(tmp_path))
+    end = float(T0)
+    # Đồng hồ chạy tiếp một chút giữa lúc API tính end và lúc chọn độ phân giải
+    monkeypatch.setattr(timeseries_store.time, "time", lambda: end + 0.5)
+    assert store.pick_resolution(end - 600, end) == 1
+    assert store.pick_resolution(end - 86400, end) == 60
+    assert store.pick_resolution(end - 7 * 86400, end) == 3600
+    assert store.pick_resolution(end - 365 * 86400, end) == 3600  # Older than every tier
+
+
+def test_read_only_store(tmp_path):
+    reader = TimeSeriesStore(str(tmp_path / "missing"), readonly=True)
+    assert reader.series() == []
+    assert reader.query("zone0_count", T0, T0 + 60, resolution=1) == (1, [])
+    with pytest.raises(RuntimeError):
+        reader.record("zone0_count", 1, now=T0)
+    assert not (tmp_path / "missing").exists()
+
+    writer = TimeSeriesStore(str(tmp_path))
+    writer.record("led", 1, now=T0)
+    writer.flush()
+    reader = TimeSeriesStore(str(tmp_path), readonly=True)
+    assert reader.series() == ["led"]
+    assert reader.query("led", T0, T0, resolution=1) == (1, [[T0, 1.0, 1.0, 1.0]])
+    assert reader.query("zone0_count", T0, T0, resolution=1) == (1, [])
+
+
+def test_rejects_invalid_series_names_and_resolutions(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    for name in ("../config", "zone0/count", "", "zone 0"):
+        with pytest.raises(ValueError):
+            store.record(name, 1, now=T0)
+        with pytest.raises(ValueError):
+            store.query(name, T0, T0 + 60)
+    with pytest.raises(ValueError):
+        store.query("zone0_count", T0, T0 + 60, resolution=5)
+    assert store.series() == []
@@ -0,0 +1,87 @@
+"""
+Test zone geometry and the per-camera zone file (save, load, invalidation)
+Run: python -m pytest test_zone_store.py
+"""
+import json
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+import zone_store
+from zone_store import ZoneGeometry, ZoneStore
+
+FRAME_SIZE = (640, 360)
+CAPTURE_SIZE = (1280, 720)
+POINTS = [[100, 50], [300, 50], [300, 250], [100, 250], [100, 50]]
+
+
+def test_from_points_computes_roi_area_and_mask():
+    zone = ZoneGeometry.from_points(POINTS, FRAME_SIZE)
+    assert zone.roi == (100, 50, 201, 201)
+    assert zone.area == 200 * 200
+    assert zone.mask.shape == (201, 201)
+    assert zone.contains((200, 150))
+    assert zone.contains((100, 50))
+    assert not zone.contains((99, 150))
+    assert not zone.contains((200, 300))
+
+
+def test_from_points_clips_to_the_frame():
+    zone = ZoneGeometry.from_points([[-50, -50], [700, -50], [700, 400], [-50, 400]], FRAME_SIZE)
+    assert zone.roi == (0, 0, 640, 360)
+    assert zone.contains((639, 359))
+    assert not zone.contains((640, 100))
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = ZoneStore(str(tmp_path), "cam1")
+    store.save({"zone0": ZoneGeometry.from_points(POINTS, FRAME_SIZE)}, FRAME_SIZE, CAPTURE_SIZE)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cam1.json", "cam1.npz"]  # No temp files left
+
+    zones = ZoneStore(str(tmp_path), "cam1").load(FRAME_SIZE, CAPTURE_SIZE)
+    assert list(zones) == ["zone0"]
+    assert zones["zone0"].points == POINTS
+    assert zones["zone0"].roi == (100, 50, 201, 201)
+    assert zones["zone0"].contains((200, 150))
+    assert ZoneStore(str(tmp_path), "cam2").load(FRAME_SIZE, CAPTURE_SIZE) == {}
+
+
+@pytest.mark.parametrize("frame_size, capture_size", [
+    ((480, 270), CAPTURE_SIZE),  # Inference size changed
+    (FRAME_SIZE, (1920, 1080)),  # Camera resolution changed
+])
+def test_load_ignores_zones_after_resolution_change(tmp_path, frame_size, capture_size):
+    store = ZoneStore(str(tmp_path))
+    store.save({"zone0": ZoneGeometry.from_points(POINTS, FRAME_SIZE)}, FRAME_SIZE, CAPTURE_SIZE)
+    assert store.load(frame_size, capture_size) == {}
+
+
+def test_load_ignores_zones_after_version_change(tmp_path, monkeypatch):
+    store = ZoneStore(str(tmp_path))
+    store.save({"zone0": ZoneGeometry.from_points(POINTS, FRAME_SIZE)}, FRAME_SIZE, CAPTURE_SIZE)
+    monkeypatch.setattr(zone_store, "ZONE_FILE_VERSION", zone_store.ZONE_FILE_VERSION + 1)
+    assert store.load(FRAME_SIZE, CAPTURE_SIZE) == {}
+
+
+def test_load_ignores_mask_that_does_not_match_roi(tmp_path):
+    store = ZoneStore(str(tmp_path))
+    store.save({"zone0": ZoneGeometry.from_points(POINTS, FRAME_SIZE)}, FRAME_SIZE, CAPTURE_SIZE)
+    with open(store.json_path) as f:
+        meta = json.load(f)
+    meta["zones"]["zone0"]["roi"] = [0, 0, 50, 50]
+    with open(store.json_path, "w") as f:
+        json.dump(meta, f)
+    assert store.load(FRAME_SIZE, CAPTURE_SIZE) == {}
+
+
+def test_missing_or_corrupt_files_load_nothing(tmp_path):
+    store = ZoneStore(str(tmp_path))
+    assert store.load(FRAME_SIZE, CAPTURE_SIZE) == {}
+    store.save({"zone0": ZoneGeometry.from_points(POINTS, FRAME_SIZE)}, FRAME_SIZE, CAPTURE_SIZE)
+    with open(store.mask_path, "wb") as f:
+        f.write(b"not a zip")
+    assert store.load(FRAME_SIZE, CAPTURE_SIZE) == {}
+
+    store.clear()
+    assert list(tmp_path.iterdir()) == []
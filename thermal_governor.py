@@ -0,0 +1,184 @@
+"""
+Thermal and CPU-load governor for the detection loop
+
+Periodically reads the CPU temperature (/sys/class/thermal) and load average
+(/proc/loadavg), combines them with the measured detection latency and steps
+between performance levels with hysteresis: up (lighter) when a limit is
+crossed, at most once per hold time, down (heavier) only after everything
+stays clearly below the limits for a while. Slow detections only move to a
+level with a smaller input size, since a longer interval between model runs
+does not make a single run faster.
+
+Level 0 runs at the base settings (from config or set remotely); lighter
+levels never run more often or with a larger input than the level before, and
+keep the base input size when the backend cannot change it.
+"""
+import os
+
+# Mỗi mức: khoảng cách giữa các lần chạy model, kích thước input, số luồng OpenCV
+DEFAULT_LEVELS = (
+    {"detect_interval": 0.0, "input_size": 416, "num_threads": 4},
+    {"detect_interval": 0.2, "input_size": 416, "num_threads": 3},
+    {"detect_interval": 0.5, "input_size": 320, "num_threads": 2},
+    {"detect_interval": 1.0, "input_size": 256, "num_threads": 2},
+)
+
+
+class ThermalGovernor:
+    """Steps detection settings between performance levels from temperature, load and latency"""
+    def __init__(self, temp_path="/sys/class/thermal/thermal_zone0/temp", loadavg_path="/proc/loadavg",
+                 levels=DEFAULT_LEVELS, base=None, dynamic_input=True, temp_high=75.0, temp_low=65.0, load_high=0.9, load_low=0.6,
+                 latency_target=0.5, poll_interval=5.0, step_up_after=20.0, step_down_after=30.0,
+                 cpu_count=None):
+        """
+        Args:
+            temp_path (str): File with the CPU temperature in millidegrees Celsius
+            loadavg_path (str): File in /proc/loadavg format
+            levels (tuple): Settings per level, lightest last
+            base (dict): detect_interval / input_size of level 0, overriding levels[0]
+            dynamic_input (bool): Whether the detector backend can change input_size at runtime
+            temp_high (float): Step up at or above this temperature (°C)
+            temp_low (float): Allow stepping down only at or below this temperature (°C)
+            load_high (float): Step up at or above this 1-minute load per CPU
+            load_low (float): Allow stepping down only at or below this load per CPU
+            latency_target (float): Step up when the average detection latency exceeds this (s)
+            poll_interval (float): Seconds between sensor reads
+            step_up_after (float): Minimum seconds between two steps up
+            step_down_after (float): Seconds of calm required before stepping down
+            cpu_count (int): CPUs used to normalize the load, defaults to os.cpu_count()
+        """
+        self.temp_path = temp_path
+        self.loadavg_path = loadavg_path
+        self._level_specs = tuple(levels)
+        self.base = dict(base or {})
+        self.dynamic_input = dynamic_input
+        self.levels = self._build_levels()
+        self.temp_high = temp_high
+        self.temp_low = temp_low
+        self.load_high = load_high
+        self.load_low = load_low
+        self.latency_target = latency_target
+        self.poll_interval = poll_interval
+        self.step_up_after = step_up_after
+        self.step_down_after = step_down_after
+        self.cpu_count = cpu_count or os.cpu_count() or 1
+        self.level = 0
+        self.temperature = None
+        self.load = None
+        self.latency = None
+        self._last_poll = None
+        self._calm_since = None
+        self._last_step_up = None
+
+    def read_temperature(self):
+        """CPU temperature in °C, or None if the sensor is unavailable"""
+        try:
+            with open(self.temp_path, 'r') as f:
+                return int(f.read().strip()) / 1000.0
+        except (OSError, ValueError):
+            return None
+
+    def read_load(self):
+        """1-minute load average per CPU, or None if unavailable"""
+        try:
+            with open(self.loadavg_path, 'r') as f:
+                return float(f.read().split()[0]) / self.cpu_count
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def report_latency(self, seconds, smoothing=0.2):
+        """Feed the duration of one detection run (exponential moving average)"""
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += smoothing * (seconds - self.latency)
+
+    def _build_levels(self):
+        levels = [dict(self._level_specs[0], **self.base)]
+        for spec in self._level_specs[1:]:
+            previous = levels[-1]
+            level = dict(spec)
+            level["detect_interval"] = max(spec.get("detect_interval", 0.0), previous["detect_interval"])
+            if self.dynamic_input:
+                level["input_size"] = min(spec.get("input_size", previous["input_size"]), previous["input_size"])
+            else:
+                level["input_size"] = previous["input_size"]
+            levels.append(level)
+        return tuple(levels)
+
+    def set_base(self, **settings):
+        """
+        Change the level 0 settings (e.g. detect_interval / input_size sent remotely)
+
+        Lighter levels are rebuilt on top of the new base, so the governor only
+        ever makes detection lighter than what was asked for.
+
+        Returns:
+            dict: Settings of the current level
+        """
+        self.base.update(settings)
+        self.levels = self._build_levels()
+        return self.settings()
+
+    def settings(self):
+        return dict(self.levels[self.level])
+
+    def _smaller_input_level(self):
+        """First lighter level with a smaller input size than the current one, or None"""
+        input_size = self.levels[self.level]["input_size"]
+        for level in range(self.level + 1, len(self.levels)):
+            if self.levels[level]["input_size"] < input_size:
+                return level
+        return None
+
+    def poll(self, now):
+        """
+        Read the sensors if the poll interval elapsed and pick a level
+
+        Args:
+            now (float): Current time in seconds
+
+        Returns:
+            dict: Settings of the new level when it changed, otherwise None
+        """
+        if self._last_poll is not None and now - self._last_poll < self.poll_interval:
+            return None
+        self._last_poll = now
+        self.temperature = self.read_temperature()
+        self.load = self.read_load()
+
+        hot = ((self.temperature is not None and self.temperature >= self.temp_high)
+               or (self.load is not None and self.load >= self.load_high))
+        # Mức nhẹ hơn duy nhất giúp giảm độ trễ mỗi lần chạy là mức có input nhỏ hơn
+        smaller = None
+        if self.latency is not None and self.latency > self.latency_target:
+            smaller = self._smaller_input_level()
+        # Độ trễ chỉ cản việc hạ mức khi mức nặng hơn dùng input lớn hơn
+        input_grows = self.level > 0 and self.levels[self.level - 1]["input_size"] > self.levels[self.level]["input_size"]
+        calm = ((self.temperature is None or self.temperature <= self.temp_low)
+                and (self.load is None or self.load <= self.load_low)
+                and (self.latency is None or self.latency <= self.latency_target * 0.6 or not input_grows))
+
+        if not calm:
+            self._calm_since = None
+        elif self._calm_since is None:
+            self._calm_since = now
+
+        new_level = self.level
+        if hot or smaller is not None:
+            # Giữ mức mới ít nhất step_up_after giây để nó kịp có tác dụng
+            if self._last_step_up is None or now - self._last_step_up >= self.step_up_after:
+                if hot:
+                    new_level = min(self.level + 1, len(self.levels) - 1)
+                if smaller is not None:
+                    new_level = max(new_level, smaller)
+        elif calm and self.level > 0 and now - self._calm_since >= self.step_down_after:
+            new_level = self.level - 1
+            self._calm_since = now
+
+        if new_level == self.level:
+            return None
+        if new_level > self.level:
+            self._last_step_up = now
+        self.level = new_level
+        return self.settings()
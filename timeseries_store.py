@@ -0,0 +1,163 @@
+"""
+Local time-series store for people counts and LED state
+
+Each series is kept in fixed-size ring buffers (one per resolution tier,
+1 s -> 1 min -> 1 h) stored as memory-mapped .npy files. Every sample is
+folded into all tiers as it is recorded, so downsampling is automatic and
+the files never grow. The Flask API opens the same files read-only.
+"""
+import os
+import re
+import time
+import numpy as np
+
+# (độ phân giải giây, số ô): 1 giờ ở 1 s, 1 ngày ở 1 phút, 90 ngày ở 1 giờ
+DEFAULT_TIERS = ((1, 3600), (60, 1440), (3600, 2160))
+
+SLOT_DTYPE = np.dtype([
+    ("t", "<i8"),    # Chỉ số bucket (thời gian // độ phân giải), -1 là ô trống
+    ("sum", "<f8"),
+    ("n", "<u4"),
+    ("min", "<f4"),
+    ("max", "<f4"),
+])
+
+_SERIES_NAME = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+
+def _check_name(series):
+    if not _SERIES_NAME.match(series):
+        raise ValueError(f"Invalid series name: {series}")
+
+
+class TimeSeriesStore:
+    def __init__(self, directory="timeseries", tiers=DEFAULT_TIERS, readonly=False, flush_interval=30.0):
+        """
+        Args:
+            directory (str): Folder holding the ring buffer files
+            tiers (tuple): (resolution_seconds, slots) pairs, finest first
+            readonly (bool): Open existing files only, never create or write
+            flush_interval (float): Seconds between flushes to disk when writing
+        """
+        self.directory = directory
+        self.tiers = tuple(tiers)
+        self.readonly = readonly
+        self.flush_interval = flush_interval
+        self._rings = {}
+        self._last_flush = time.time()
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, series, resolution):
+        return os.path.join(self.directory, f"{series}.{resolution}s.npy")
+
+    def _ring(self, series, resolution, slots):
+        key = (series, resolution)
+        ring = self._rings.get(key)
+        if ring is not None:
+            return ring
+
+        path = self._path(series, resolution)
+        if os.path.exists(path):
+            ring = np.load(path, mmap_mode="r" if self.readonly else "r+")
+            if ring.dtype != SLOT_DTYPE or ring.shape != (slots,):
+                raise ValueError(f"Unexpected layout in {path}")
+        elif self.readonly:
+            return None
+        else:
+            ring = np.lib.format.open_memmap(path, mode="w+", dtype=SLOT_DTYPE, shape=(slots,))
+            ring["t"] = -1
+        self._rings[key] = ring
+        return ring
+
+    def series(self):
+        """List the series names stored in the directory"""
+        if not os.path.isdir(self.directory):
+            return []
+        suffix = f".{self.tiers[0][0]}s.npy"
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.directory) if name.endswith(suffix))
+
+    def record(self, series, value, now=None):
+        """
+        Add a sample to every tier of a series
+
+        Args:
+            series (str): Series name, e.g. "zone0_count"
+            value (float): Sample value
+            now (float): Sample time in seconds, defaults to time.time()
+        """
+        if self.readonly:
+            raise RuntimeError("TimeSeriesStore opened read-only")
+        _check_name(series)
+        now = time.time() if now is None else now
+
+        for resolution, slots in self.tiers:
+            ring = self._ring(series, resolution, slots)
+            bucket = int(now // resolution)
+            slot = ring[bucket % slots:bucket % slots + 1]
+            if slot["t"][0] != bucket:
+                # Ô cũ của vòng trước: ghi đè
+                slot[0] = (bucket, value, 1, value, value)
+            else:
+                slot["sum"] += value
+                slot["n"] += 1
+                slot["min"] = min(slot["min"][0], value)
+                slot["max"] = max(slot["max"][0], value)
+
+        if now - self._last_flush >= self.flush_interval:
+            self.flush()
+            self._last_flush = now
+
+    def flush(self):
+        for ring in self._rings.values():
+            if isinstance(ring, np.memmap) and not self.readonly:
+                ring.flush()
+
+    def pick_resolution(self, start, end, max_points=1500):
+        """Finest tier that still covers [start, end] within max_points"""
+        now = time.time()
+        for resolution, slots in self.tiers:
+            # Cho phép lệch một bucket: end thường được lấy từ time.time() ngay trước đó
+            covers = now - start <= resolution * (slots + 1)
+            if covers and (end - start) / resolution <= max_points:
+                return resolution
+        return self.tiers[-1][0]
+
+    def query(self, series, start, end, resolution=None, max_points=1500):
+        """
+        Read a time range from a series
+
+        Memory use is bounded by the ring size of the chosen tier, whatever the range.
+
+        Args:
+            series (str): Series name
+            start (float): Range start in seconds
+            end (float): Range end in seconds
+            resolution (int): Tier resolution in seconds, None picks one automatically
+            max_points (int): Point budget used when picking the resolution
+
+        Returns:
+            tuple: (resolution, list of [timestamp, mean, min, max])
+        """
+        _check_name(series)
+        if resolution is None:
+            resolution = self.pick_resolution(start, end, max_points)
+        tier = dict(self.tiers)
+        if resolution not in tier:
+            raise ValueError(f"Unknown resolution {resolution}, expected one of {sorted(tier)}")
+        slots = tier[resolution]
+
+        ring = self._ring(series, resolution, slots)
+        if ring is None or end < start:
+            return resolution, []
+
+        # Không đọc quá một vòng của ring
+        first = max(int(start // resolution), int(end // resolution) - slots + 1)
+        buckets = np.arange(first, int(end // resolution) + 1, dtype=np.int64)
+        rows = ring[buckets % slots]
+        rows = rows[rows["t"] == buckets]
+
+        mean = rows["sum"] / np.maximum(rows["n"], 1)
+        points = [[int(t) * resolution, round(float(m), 3), float(lo), float(hi)]
+                  for t, m, lo, hi in zip(rows["t"], mean, rows["min"], rows["max"])]
+        return resolution, points
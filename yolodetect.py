@@ -2,10 +2,21 @@ from shapely.geometry import Point
 from shapely.geometry.polygon import Polygon
 import cv2
 import numpy as np
-from telegram_utils import send_telegram
+from telegram_utils import send_telegram, send_telegram_message
 import datetime
 import threading
+import time
 from captureDrive import DriveUploader
+from config import (CLASSNAMES_FILE, CONFIDENCE_THRESHOLD, ALERT_COOLDOWN_SECONDS,
+                    INTRUSION_ENTER_DWELL_SECONDS, INTRUSION_EXIT_GRACE_SECONDS, INTRUSION_MIN_HOLD_SECONDS,
+                    OCCUPANCY_WINDOW_SECONDS, OCCUPANCY_GRID_SIZE, OCCUPANCY_HEATMAP_FILE, TIMESERIES_DIR,
+                    SNAPSHOT_DEDUP_THRESHOLD, SNAPSHOT_DEDUP_HISTORY, SNAPSHOT_DUPLICATE_ACTION,
+                    SNAPSHOT_SCALE, EVIDENCE_SCALE)
+from detector_backends import create_backend_from_config
+from intrusion_state import IntrusionStateMachine, EVENT_START, STATE_ACTIVE
+from occupancy_stats import OccupancyAccumulator
+from timeseries_store import TimeSeriesStore
+from snapshot_dedup import SnapshotDeduplicator
 
 def isInside(points, centroid):
     polygon = Polygon(points)
@@ -13,28 +24,44 @@ def isInside(points, centroid):
     return polygon.contains(centroid)
 
 class YoloDetect():
-    def __init__(self, detect_class="person", frame_width=1280, frame_height=720, mqtt_client=None):
+    zone_id = "zone0"
+
+    def __init__(self, detect_class="person", frame_width=1280, frame_height=720, mqtt_client=None, backend=None):
         # Parameters
-        self.classnames_file = "model/classnames.txt"
-        self.weights_file = "model/yolov4-tiny.weights"
-        self.config_file = "model/yolov4-tiny.cfg"
-        self.conf_threshold = 0.5
+        self.classnames_file = CLASSNAMES_FILE
+        self.conf_threshold = CONFIDENCE_THRESHOLD
         self.nms_threshold = 0.4
         self.detect_class = detect_class
         self.frame_width = frame_width
         self.frame_height = frame_height
-        self.scale = 1 / 255
-        self.model = cv2.dnn.readNet(self.weights_file, self.config_file)
+        # Backend (darknet/onnx) chọn từ config nếu không truyền vào
+        self.backend = backend if backend is not None else create_backend_from_config()
         self.classes = None
-        self.output_layers = None
         self.last_people_count = -1 
         self.inside_count = 0
         self.read_class_file()
-        self.get_output_layers()
+        self.detect_class_ids = {i for i, name in enumerate(self.classes) if name == self.detect_class}
         self.last_alert = None
-        self.alert_telegram_each = 15  # seconds
+        self.alert_telegram_each = ALERT_COOLDOWN_SECONDS  # seconds
+        # Bỏ qua ảnh cảnh báo gần giống ảnh vừa gửi (cùng cảnh, cùng người đứng yên)
+        self.snapshot_filter = SnapshotDeduplicator(threshold=SNAPSHOT_DEDUP_THRESHOLD,
+                                                    history=SNAPSHOT_DEDUP_HISTORY)
+        self.last_snapshot_event = None
+        # Hàm trả về (ảnh độ phân giải đầy đủ, scale_x, scale_y) cho ảnh bằng chứng;
+        # None thì dùng chính frame đã vẽ (chế độ một độ phân giải)
+        self.evidence_source = None
+        self.last_points = []
+        self.last_boxes = []  # (x1, y1, x2, y2, class_id) của các người phát hiện ở lần chạy model gần nhất
+        self.zone = None  # ZoneGeometry của vùng giám sát hiện tại (mask tính sẵn)
         self.last_people_count_send = None  # Thời gian gửi số người lần cuối
-        self.people_count_interval = 1.0  # Gửi số người mỗi 1 giây
+        self.people_count_interval = 1.0  # Gửi số người mỗi 1 giây (khi không dùng thống kê theo cửa sổ)
+        # Thống kê theo cửa sổ thời gian thay cho gửi số người thô mỗi giây
+        self.occupancy = None
+        if OCCUPANCY_WINDOW_SECONDS > 0:
+            self.occupancy = OccupancyAccumulator(window_seconds=OCCUPANCY_WINDOW_SECONDS,
+                                                  grid_size=OCCUPANCY_GRID_SIZE)
+        # Lưu lịch sử số người / trạng thái LED tại chỗ (đọc qua apiBackend.py)
+        self.history = TimeSeriesStore(TIMESERIES_DIR) if TIMESERIES_DIR else None
         self.mqtt_client = mqtt_client
         self.mqtt_connected = False
         if self.mqtt_client is not None:
@@ -44,7 +71,12 @@ class YoloDetect():
         # Thêm biến theo dõi trạng thái LED
         self.last_led_state = -1  # -1 là trạng thái chưa xác định, 0: tắt, 1: bật
 
-        self.intrusion_active = False
+        # Máy trạng thái xâm nhập: chỉ phát sự kiện start/end sau dwell/grace/hold
+        self.intrusion = IntrusionStateMachine(
+            enter_dwell=INTRUSION_ENTER_DWELL_SECONDS,
+            exit_grace=INTRUSION_EXIT_GRACE_SECONDS,
+            min_hold=INTRUSION_MIN_HOLD_SECONDS
+        )
         self.drive_uploader = DriveUploader(
         folder_id="____your_folder_id____",
         credentials_file="____your_credentials_file____"
@@ -54,11 +86,7 @@ class YoloDetect():
         with open(self.classnames_file, 'r') as f:
             self.classes = [line.strip() for line in f.readlines()]
 
-    def get_output_layers(self):
-        layer_names = self.model.getLayerNames()
-        self.output_layers = [layer_names[i - 1] for i in self.model.getUnconnectedOutLayers()]
-
-    def draw_prediction(self, img, class_id, x, y, x_plus_w, y_plus_h, points):
+    def draw_box(self, img, class_id, x, y, x_plus_w, y_plus_h):
         label = str(self.classes[class_id])
         color = (0, 255, 0)
         cv2.rectangle(img, (x, y), (x_plus_w, y_plus_h), color, 2)
@@ -67,67 +95,158 @@ class YoloDetect():
         # Calculate centroid
         centroid = ((x + x_plus_w) // 2, (y + y_plus_h) // 2)
         cv2.circle(img, centroid, 5, (color), -1)
+        return centroid
 
-        # Check if person is inside the defined area
-        person_inside = isInside(points, centroid)
-        
-        if person_inside:
-            img = self.alert(img)
+    def draw_prediction(self, img, class_id, x, y, x_plus_w, y_plus_h, points):
+        centroid = self.draw_box(img, class_id, x, y, x_plus_w, y_plus_h)
+
+        # Check if person is inside the defined area (dùng mask tính sẵn nếu có)
+        if self.zone is not None:
+            person_inside = self.zone.contains(centroid)
+        else:
+            person_inside = isInside(points, centroid)
             
         return person_inside
 
-    def alert(self, img):
+    def draw_last_detections(self, img):
+        """Vẽ lại kết quả lần chạy model gần nhất lên frame không chạy model (detect_interval > 0)"""
+        for x1, y1, x2, y2, class_id in self.last_boxes:
+            self.draw_box(img, class_id, round(x1), round(y1), round(x2), round(y2))
+        if self.intrusion.tracker(self.zone_id).state == STATE_ACTIVE:
+            cv2.putText(img, "ALARM!!!!", (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        return img
+
+    def alert(self, img, event_id):
         cv2.putText(img, "ALARM!!!!", (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
         if (self.last_alert is None) or (
                 (datetime.datetime.utcnow() - self.last_alert).total_seconds() > self.alert_telegram_each):
             self.last_alert = datetime.datetime.utcnow()
             
-            # Tạo tên file và lưu ảnh
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"alert_{timestamp}.jpg"
-            cv2.imwrite(filename, cv2.resize(img, dsize=None, fx=0.2, fy=0.2))
+            snapshot = self._make_snapshot(img)
+
+            # Ảnh đầu tiên của mỗi sự kiện luôn được gửi
+            first_of_event = event_id != self.last_snapshot_event
+            self.last_snapshot_event = event_id
+            duplicate, distance = self.snapshot_filter.check(self.zone_id, snapshot, force=first_of_event)
+            if duplicate:
+                print(f"Bỏ qua ảnh trùng (Hamming {distance}) cho sự kiện {event_id}")
+                if SNAPSHOT_DUPLICATE_ACTION == "text":
+                    threading.Thread(
+                        target=send_telegram_message,
+                        args=(f"⚠️ Vẫn còn xâm nhập (sự kiện {event_id})",)
+                    ).start()
+                return img
+            
+            # Tạo tên file và lưu ảnh (tên file gắn với mã sự kiện)
+            filename = f"alert_{event_id}.jpg"
+            cv2.imwrite(filename, snapshot)
             
             # Upload lên Drive
             upload_thread = threading.Thread(
                 target=self.drive_uploader.upload_image,
-                args=(filename, "human", "21040202")  
+                args=(filename, "human", "21040202", event_id)
             )
             upload_thread.start()
             
             # Gửi Telegram
-            send_telegram_thread = threading.Thread(target=send_telegram)
+            send_telegram_thread = threading.Thread(
+                target=send_telegram,
+                args=(filename, f"⚠️ Có xâm nhập, nguy hiểm! (sự kiện {event_id})")
+            )
             send_telegram_thread.start()
             
         return img
 
-    def detect(self, frame, points):
-        blob = cv2.dnn.blobFromImage(frame, self.scale, (416, 416), (0, 0, 0), True, crop=False)
-        self.model.setInput(blob)
-        outs = self.model.forward(self.output_layers)
+    def _make_snapshot(self, img):
+        """Ảnh cảnh báo: lấy từ frame độ phân giải đầy đủ nếu có, ngược lại thu nhỏ frame đã vẽ"""
+        evidence, scale_x, scale_y = (None, 1.0, 1.0)
+        if self.evidence_source is not None:
+            evidence, scale_x, scale_y = self.evidence_source()
+        if evidence is None:
+            # Vùng giám sát được vẽ bằng overlay sau khi phát hiện nên phải vẽ vào ảnh cảnh báo
+            snapshot = cv2.resize(img, dsize=None, fx=SNAPSHOT_SCALE, fy=SNAPSHOT_SCALE)
+            self._draw_zone(snapshot, SNAPSHOT_SCALE, SNAPSHOT_SCALE)
+            return snapshot
 
-        class_ids = []
-        confidences = []
-        boxes = []
-        
-        for out in outs:
-            for detection in out:
-                scores = detection[5:]
-                class_id = np.argmax(scores)
-                confidence = scores[class_id]
-                if (confidence >= self.conf_threshold) and (self.classes[class_id] == self.detect_class):
-                    center_x = int(detection[0] * self.frame_width)
-                    center_y = int(detection[1] * self.frame_height)
-                    w = int(detection[2] * self.frame_width)
-                    h = int(detection[3] * self.frame_height)
-                    x = center_x - w / 2
-                    y = center_y - h / 2
-                    class_ids.append(class_id)
-                    confidences.append(float(confidence))
-                    boxes.append([x, y, w, h])
+        # Vẽ lại vùng giám sát và các box theo toạ độ ảnh gốc
+        self._draw_zone(evidence, scale_x, scale_y)
+        for x1, y1, x2, y2, _ in self.last_boxes:
+            cv2.rectangle(evidence, (int(x1 * scale_x), int(y1 * scale_y)),
+                          (int(x2 * scale_x), int(y2 * scale_y)), (0, 255, 0), 2)
+        cv2.putText(evidence, "ALARM!!!!", (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        if EVIDENCE_SCALE != 1.0:
+            evidence = cv2.resize(evidence, dsize=None, fx=EVIDENCE_SCALE, fy=EVIDENCE_SCALE)
+        return evidence
+
+    def _draw_zone(self, img, scale_x, scale_y):
+        """Vẽ đường bao vùng giám sát lên ảnh có tỉ lệ (scale_x, scale_y) so với frame xử lý"""
+        if len(self.last_points) > 1:
+            zone = np.int32(np.array(self.last_points) * np.array([scale_x, scale_y]))
+            cv2.polylines(img, [zone], False, (255, 0, 0), thickness=2)
+
+    def _handle_intrusion_event(self, event):
+        """Gửi trạng thái LED cho sự kiện bắt đầu/kết thúc xâm nhập"""
+        led_state = 1 if event.kind == EVENT_START else 0
+        if event.kind == EVENT_START:
+            # Sự kiện mới luôn gửi ảnh đầu tiên ngay
+            self.last_alert = None
+        print(f"Intrusion {event.kind}: {event.event_id}")
+
+        if self.mqtt_client and self.mqtt_connected and led_state != self.last_led_state:
+            thread = threading.Thread(target=self._send_mqtt_alert, args=(led_state, event.event_id))
+            thread.start()
+        self.last_led_state = led_state
+
+        # Số ảnh đã gửi / bỏ qua được báo sau mỗi sự kiện, không phụ thuộc cửa sổ thống kê
+        if event.kind != EVENT_START and self.mqtt_client and self.mqtt_connected:
+            thread = threading.Thread(target=self._send_snapshot_stats, args=(self.snapshot_filter.stats(),))
+            thread.start()
+
+    def apply_settings(self, settings):
+        """
+        Áp dụng cấu hình phát hiện khi đang chạy (không nạp lại model)
+
+        Args:
+            settings (dict): Validated settings, see runtime_config.SETTINGS_SCHEMA
+
+        Returns:
+            list: Names of the settings applied to the detector
+        """
+        applied = []
+        if "conf_threshold" in settings:
+            self.conf_threshold = settings["conf_threshold"]
+            applied.append("conf_threshold")
+        if "nms_threshold" in settings:
+            self.nms_threshold = settings["nms_threshold"]
+            applied.append("nms_threshold")
+        if "input_size" in settings and self.backend.supports_dynamic_input:
+            # Backend tự cấp phát lại buffer blob khi kích thước thay đổi
+            self.backend.input_size = (settings["input_size"], settings["input_size"])
+            applied.append("input_size")
+        return applied
+
+    def set_zone(self, zone):
+        """Dùng hình học tính sẵn (ZoneGeometry) để kiểm tra người trong vùng"""
+        self.zone = zone
+
+    def reset_zone(self):
+        """Đóng sự kiện xâm nhập đang mở khi vùng giám sát bị xoá"""
+        self.zone = None
+        self.last_boxes = []
+        event = self.intrusion.reset(self.zone_id, time.time())
+        if event is not None:
+            self._handle_intrusion_event(event)
+
+    def detect(self, frame, points):
+        # Backend tự giải mã output thành boxes theo toạ độ pixel của frame
+        boxes, confidences, class_ids = self.backend.detect(frame, self.conf_threshold, self.detect_class_ids)
 
         indices = cv2.dnn.NMSBoxes(boxes, confidences, self.conf_threshold, self.nms_threshold)
 
         inside_count = 0
+        centroids = []
+        self.last_points = points
+        self.last_boxes = []
         # Draw bounding boxes and count people inside the area
         for i in indices:
             # Handle differences between OpenCV versions
@@ -140,20 +259,28 @@ class YoloDetect():
             w = box[2]
             h = box[3]
             person_inside = self.draw_prediction(frame, class_ids[i], round(x), round(y), round(x + w), round(y + h), points)
+            centroids.append((x + w / 2, y + h / 2))
+            self.last_boxes.append((x, y, x + w, y + h, class_ids[i]))
             if person_inside:
                 inside_count += 1
 
-        # Xử lý trạng thái đèn LED
-        new_led_state = 1 if inside_count > 0 else 0
-        
-        # Chỉ gửi MQTT khi trạng thái LED thay đổi
-        if self.mqtt_client and self.mqtt_connected and new_led_state != self.last_led_state:
-            thread = threading.Thread(target=self._send_mqtt_alert, args=(new_led_state,))
-            thread.start()
-            self.last_led_state = new_led_state
+        # Cập nhật máy trạng thái; chỉ gửi MQTT khi có sự kiện start/end
+        for event in self.intrusion.update({self.zone_id: inside_count}, time.time()):
+            self._handle_intrusion_event(event)
+
+        # Chỉ cảnh báo/chụp ảnh khi vùng đang có người (không trong thời gian exit grace / min hold)
+        tracker = self.intrusion.tracker(self.zone_id)
+        if tracker.state == STATE_ACTIVE:
+            frame = self.alert(frame, tracker.event_id)
+
+        if self.history is not None:
+            self._record_history(inside_count)
+
+        if self.occupancy is not None:
+            self._update_occupancy(frame, inside_count, centroids)
 
         # Gửi số người với throttling 1 giây
-        if self.mqtt_client and self.mqtt_connected:
+        elif self.mqtt_client and self.mqtt_connected:
             current_time = datetime.datetime.now()
             # Gửi nếu chưa từng gửi hoặc đã quá 1 giây từ lần gửi cuối
             should_send = (self.last_people_count_send is None or 
@@ -168,11 +295,52 @@ class YoloDetect():
         
         return frame, inside_count
 
-    def _send_mqtt_alert(self, state):
+    def _record_history(self, inside_count):
+        """Ghi số người và trạng thái LED vào bộ lưu chuỗi thời gian"""
+        now = time.time()
+        try:
+            self.history.record(f"{self.zone_id}_count", inside_count, now)
+            self.history.record("led", max(self.last_led_state, 0), now)
+        except Exception as e:
+            print(f"Lỗi ghi lịch sử: {e}")
+
+    def _update_occupancy(self, frame, inside_count, centroids):
+        """Cộng dồn mẫu vào thống kê và gửi bản tóm tắt khi hết cửa sổ"""
+        now = time.time()
+        self.occupancy.add(now, {self.zone_id: inside_count}, centroids,
+                           frame_size=(frame.shape[1], frame.shape[0]))
+        if not self.occupancy.ready(now):
+            return
+
+        summary = self.occupancy.summary(now)
+        summary["snapshots"] = self.snapshot_filter.stats()
+        try:
+            self.occupancy.save_heatmap(OCCUPANCY_HEATMAP_FILE)
+        except Exception as e:
+            print(f"Lỗi lưu heatmap: {e}")
+        if self.mqtt_client and self.mqtt_connected:
+            thread = threading.Thread(target=self._send_occupancy_summary, args=(summary,))
+            thread.start()
+
+    def _send_occupancy_summary(self, summary):
+        """Gửi thống kê theo cửa sổ đến E-Ra"""
+        try:
+            self.mqtt_client.publish_occupancy_summary(summary)
+        except Exception as e:
+            print(f"Lỗi gửi thống kê: {e}")
+
+    def _send_snapshot_stats(self, stats):
+        """Gửi thống kê ảnh cảnh báo (đã gửi / bỏ qua) đến E-Ra"""
+        try:
+            self.mqtt_client.publish_snapshot_stats(stats)
+        except Exception as e:
+            print(f"Lỗi gửi thống kê ảnh: {e}")
+
+    def _send_mqtt_alert(self, state, event_id=None):
         """Gửi trạng thái LED đến E-Ra"""
         try:
             # Sử dụng hàm publish_intrusion_alert của mqtt_client
             if self.mqtt_client:
-                self.mqtt_client.publish_intrusion_alert(state)
+                self.mqtt_client.publish_intrusion_alert(state, event_id)
         except Exception as e:
             print(f"Lỗi gửi trạng thái LED: {e}")
\ No newline at end of file
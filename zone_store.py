@@ -0,0 +1,130 @@
+"""
+Persistent monitoring zones with precomputed geometry
+
+Zones are saved per camera in a versioned JSON file (points, bounding ROI,
+area) next to a .npz holding the rasterized masks, so a restarted node can
+resume monitoring immediately. Saved zones are ignored when the file version
+or the camera/frame resolution no longer matches.
+"""
+import json
+import os
+import cv2
+import numpy as np
+
+ZONE_FILE_VERSION = 1
+
+
+class ZoneGeometry:
+    """Zone polygon with its bounding ROI, area and rasterized mask"""
+    def __init__(self, points, roi, area, mask):
+        """
+        Args:
+            points (list): Polygon points [[x, y], ...], closed (last == first)
+            roi (tuple): Bounding box (x, y, w, h) in frame pixels
+            area (float): Polygon area in square pixels
+            mask (numpy.ndarray): Boolean mask of shape (h, w) covering the ROI
+        """
+        self.points = points
+        self.roi = tuple(int(v) for v in roi)
+        self.area = float(area)
+        self.mask = mask
+
+    @classmethod
+    def from_points(cls, points, frame_size):
+        """Compute ROI, area and mask for a polygon inside a frame of (width, height)"""
+        polygon = np.array(points, dtype=np.int32).reshape(-1, 2)
+        width, height = frame_size
+        polygon[:, 0] = np.clip(polygon[:, 0], 0, width - 1)
+        polygon[:, 1] = np.clip(polygon[:, 1], 0, height - 1)
+        x, y, w, h = cv2.boundingRect(polygon)
+        mask = np.zeros((h, w), dtype=np.uint8)
+        cv2.fillPoly(mask, [polygon - (x, y)], 1)
+        area = abs(cv2.contourArea(polygon.astype(np.float32)))
+        return cls([list(p) for p in points], (x, y, w, h), area, mask.astype(bool))
+
+    def contains(self, point):
+        """True if the (x, y) point falls inside the zone mask"""
+        x, y, w, h = self.roi
+        px, py = int(point[0]) - x, int(point[1]) - y
+        if px < 0 or py < 0 or px >= w or py >= h:
+            return False
+        return bool(self.mask[py, px])
+
+
+class ZoneStore:
+    """Per-camera zone file (JSON metadata + .npz masks)"""
+    def __init__(self, directory="zones", camera_id="camera0"):
+        self.directory = directory
+        self.camera_id = camera_id
+        self.json_path = os.path.join(directory, f"{camera_id}.json")
+        self.mask_path = os.path.join(directory, f"{camera_id}.npz")
+
+    def save(self, zones, frame_size, capture_size):
+        """
+        Save zones for this camera
+
+        Args:
+            zones (dict): zone_id -> ZoneGeometry
+            frame_size (tuple): (width, height) of the frame the points refer to
+            capture_size (tuple): (width, height) of the camera capture
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        meta = {
+            "version": ZONE_FILE_VERSION,
+            "camera": self.camera_id,
+            "frame_size": list(frame_size),
+            "capture_size": list(capture_size),
+            "zones": {zone_id: {"points": zone.points, "roi": list(zone.roi), "area": zone.area}
+                      for zone_id, zone in zones.items()},
+        }
+        # Ghi file tạm rồi đổi tên để không để lại file hỏng khi mất điện giữa chừng
+        mask_tmp_path = self.mask_path + ".tmp"
+        with open(mask_tmp_path, 'wb') as f:
+            np.savez_compressed(f, **{zone_id: zone.mask for zone_id, zone in zones.items()})
+        json_tmp_path = self.json_path + ".tmp"
+        with open(json_tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(mask_tmp_path, self.mask_path)
+        os.replace(json_tmp_path, self.json_path)
+
+    def load(self, frame_size, capture_size):
+        """
+        Load saved zones if they are still valid for this camera setup
+
+        Returns:
+            dict: zone_id -> ZoneGeometry, empty if missing or invalidated
+        """
+        try:
+            with open(self.json_path, 'r') as f:
+                meta = json.load(f)
+            masks = np.load(self.mask_path)
+        except Exception as e:
+            if os.path.exists(self.json_path):
+                print(f"Cannot read saved zones: {e}")
+            return {}
+
+        if meta.get("version") != ZONE_FILE_VERSION:
+            print("Saved zones ignored: file version changed")
+            return {}
+        if meta.get("frame_size") != list(frame_size) or meta.get("capture_size") != list(capture_size):
+            print(f"Saved zones ignored: resolution changed from {meta.get('capture_size')} to {list(capture_size)}")
+            return {}
+
+        zones = {}
+        with masks:
+            for zone_id, data in meta.get("zones", {}).items():
+                if zone_id not in masks.files:
+                    continue
+                zone = ZoneGeometry(data["points"], data["roi"], data["area"], masks[zone_id])
+                # Mask không khớp ROI (file JSON và .npz từ hai lần lưu khác nhau): bỏ qua
+                if zone.mask.shape != (zone.roi[3], zone.roi[2]):
+                    print(f"Saved zone {zone_id} ignored: mask does not match its ROI")
+                    continue
+                zones[zone_id] = zone
+        return zones
+
+    def clear(self):
+        """Delete the saved zones for this camera"""
+        for path in (self.json_path, self.mask_path):
+            if os.path.exists(path):
+                os.remove(path)